@@ -0,0 +1,212 @@
+"""
+Agregación en ventana deslizante para los servicios de clima.
+
+El sensor transmite cada ~16s, pero un servicio como Weathercloud recibe
+un push cada 10 minutos: mandar sólo la última muestra hace que viento y
+ráfaga sean ruido instantáneo. WindowAggregator resume la ventana:
+
+    viento     promedio de velocidad, ráfaga máxima
+    dirección  promedio vectorial (ponderado por velocidad; 350° y 10° dan 0°)
+    temp/hum   mínimo, máximo y promedio
+
+Cada muestra se agrega y se descarta una sola vez: sumas acumuladas para
+los promedios y deques monótonas para mínimos/máximos, así que `add` es
+O(1) amortizado sin importar el largo de la ventana.
+
+    agg = WindowAggregator(600)
+    for r in records:
+        agg.add(r)
+    summary = agg.summary()   # WindowSummary o None si no hay muestras
+
+El estado (las muestras de la ventana) se puede guardar con to_dict /
+from_dict para que la ventana sobreviva entre ejecuciones del timer.
+"""
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Tuple
+
+from targets.base import WeatherRecord
+
+# (timestamp, viento, ráfaga, dirección, temp, humedad)
+Sample = Tuple[float, Optional[float], Optional[float], Optional[float], Optional[float], Optional[float]]
+
+
+@dataclass
+class WindowSummary:
+    """Resumen de las muestras de una ventana."""
+    samples: int
+    wind_speed_ms: Optional[float] = None  # promedio
+    gust_ms: Optional[float] = None        # máximo
+    wind_dir: Optional[float] = None       # promedio vectorial, 0-360
+    temp_c: Optional[float] = None         # promedio
+    temp_min: Optional[float] = None
+    temp_max: Optional[float] = None
+    humidity: Optional[float] = None       # promedio
+    humidity_min: Optional[float] = None
+    humidity_max: Optional[float] = None
+
+
+class _MonotonicDeque:
+    """Mínimo o máximo de una ventana deslizante en O(1) amortizado."""
+
+    def __init__(self, maximum: bool):
+        self.maximum = maximum
+        self.items: Deque[Tuple[float, float]] = deque()
+
+    def push(self, ts: float, value: float):
+        items = self.items
+        if self.maximum:
+            while items and items[-1][1] <= value:
+                items.pop()
+        else:
+            while items and items[-1][1] >= value:
+                items.pop()
+        items.append((ts, value))
+
+    def expire(self, cutoff: float):
+        items = self.items
+        while items and items[0][0] < cutoff:
+            items.popleft()
+
+    def value(self) -> Optional[float]:
+        return self.items[0][1] if self.items else None
+
+
+class _RunningMean:
+    __slots__ = ('total', 'count')
+
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, value: Optional[float], sign: int = 1):
+        if value is not None:
+            self.total += sign * value
+            self.count += sign
+
+    def value(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+class WindowAggregator:
+    """Ventana deslizante de `window` segundos sobre los registros recibidos."""
+
+    def __init__(self, window: float):
+        self.window = window
+        self.samples: Deque[Sample] = deque()
+        self.last_ts = float('-inf')
+        self._reset()
+
+    def _reset(self):
+        self._speed = _RunningMean()
+        self._temp = _RunningMean()
+        self._hum = _RunningMean()
+        # Componentes de la dirección: ponderadas por velocidad y unitarias
+        # (para el caso de calma, con todas las velocidades en 0)
+        self._u = self._v = 0.0
+        self._unit_u = self._unit_v = 0.0
+        self._gust_max = _MonotonicDeque(maximum=True)
+        self._temp_min = _MonotonicDeque(maximum=False)
+        self._temp_max = _MonotonicDeque(maximum=True)
+        self._hum_min = _MonotonicDeque(maximum=False)
+        self._hum_max = _MonotonicDeque(maximum=True)
+
+    def _apply(self, sample: Sample, sign: int):
+        _, speed, _, direction, temp, hum = sample
+        self._speed.add(speed, sign)
+        self._temp.add(temp, sign)
+        self._hum.add(hum, sign)
+        if direction is not None:
+            rad = math.radians(direction)
+            su, sv = math.sin(rad), math.cos(rad)
+            weight = speed or 0.0
+            self._u += sign * weight * su
+            self._v += sign * weight * sv
+            self._unit_u += sign * su
+            self._unit_v += sign * sv
+
+    def add(self, record: WeatherRecord) -> bool:
+        """
+        Agrega un registro a la ventana.
+
+        Returns:
+            False si el registro no es posterior al último agregado
+            (re-envío del mismo archivo, o fuera de orden).
+        """
+        ts = record.fecha_medicion.timestamp()
+        if ts <= self.last_ts:
+            return False
+        sample = (ts, record.wind_speed_ms, record.gust_ms, record.wind_dir,
+                  record.temp_c, None if record.humidity is None else float(record.humidity))
+        self._push(sample)
+        return True
+
+    def _push(self, sample: Sample):
+        ts, _, gust, _, temp, hum = sample
+        self.last_ts = ts
+        self.samples.append(sample)
+        self._apply(sample, 1)
+        if gust is not None:
+            self._gust_max.push(ts, gust)
+        if temp is not None:
+            self._temp_min.push(ts, temp)
+            self._temp_max.push(ts, temp)
+        if hum is not None:
+            self._hum_min.push(ts, hum)
+            self._hum_max.push(ts, hum)
+        self._expire(ts - self.window)
+
+    def _expire(self, cutoff: float):
+        samples = self.samples
+        while samples and samples[0][0] < cutoff:
+            self._apply(samples.popleft(), -1)
+        if not samples:
+            self._reset()  # descarta el error de redondeo acumulado
+            return
+        for extreme in (self._gust_max, self._temp_min, self._temp_max, self._hum_min, self._hum_max):
+            extreme.expire(cutoff)
+
+    def summary(self) -> Optional[WindowSummary]:
+        """Resumen de la ventana actual (None si está vacía)."""
+        if not self.samples:
+            return None
+
+        wind_dir = None
+        u, v = self._u, self._v
+        if abs(u) < 1e-9 and abs(v) < 1e-9:
+            u, v = self._unit_u, self._unit_v  # calma: promedio sin ponderar
+        if abs(u) >= 1e-9 or abs(v) >= 1e-9:
+            wind_dir = math.degrees(math.atan2(u, v)) % 360
+
+        return WindowSummary(
+            samples=len(self.samples),
+            wind_speed_ms=self._speed.value(),
+            gust_ms=self._gust_max.value(),
+            wind_dir=wind_dir,
+            temp_c=self._temp.value(),
+            temp_min=self._temp_min.value(),
+            temp_max=self._temp_max.value(),
+            humidity=self._hum.value(),
+            humidity_min=self._hum_min.value(),
+            humidity_max=self._hum_max.value(),
+        )
+
+    def to_dict(self) -> dict:
+        return {'window': self.window, 'samples': [list(s) for s in self.samples]}
+
+    @classmethod
+    def from_dict(cls, d: dict, window: Optional[float] = None) -> 'WindowAggregator':
+        agg = cls(window if window is not None else d.get('window', 600))
+        for sample in d.get('samples', []):
+            if len(sample) == 6 and sample[0] > agg.last_ts:
+                agg._push(tuple(sample))
+        return agg
+
+
+def aggregate_records(records: List[WeatherRecord], window: float) -> Optional[WindowSummary]:
+    """Resumen de una lista de registros (la ventana termina en el más nuevo)."""
+    agg = WindowAggregator(window)
+    for record in sorted(records, key=lambda r: r.fecha_medicion):
+        agg.add(record)
+    return agg.summary()
@@ -0,0 +1,158 @@
+"""
+Motor asyncio para enviar a los servicios de clima sin bloquear.
+
+Un único event loop (en un thread propio) con una sesión aiohttp
+compartida atiende a todos los servicios: los pushes se solapan, así que
+agregar servicios casi no suma latencia al ciclo.
+
+Cubre:
+    - targets HTTP (`HttpServiceTarget`: weathercloud, wunderground,
+      pwsweather, windguru, windy, openweathermap), vía `submit_target`
+    - integraciones (`WeatherServiceBase`), vía `push_services`
+
+aiohttp es opcional: si no está instalado `AVAILABLE` es False y el
+processor sigue usando el envío con threads.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+try:
+    import aiohttp
+except ImportError:  # dependencia opcional
+    aiohttp = None
+
+AVAILABLE = aiohttp is not None
+
+logger = logging.getLogger('wh2900')
+
+DEFAULT_LIMIT_PER_HOST = 4
+
+
+class AsyncDeliveryEngine:
+    """Event loop en background con una sesión aiohttp keep-alive."""
+
+    def __init__(self, limit_per_host: int = DEFAULT_LIMIT_PER_HOST):
+        if not AVAILABLE:
+            raise RuntimeError("aiohttp no está instalado")
+        self.limit_per_host = limit_per_host
+        self._session: Optional['aiohttp.ClientSession'] = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='wh2900-async-http', daemon=True)
+        self._thread.start()
+
+    async def _get_session(self) -> 'aiohttp.ClientSession':
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self.limit_per_host)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    @staticmethod
+    def _timeout(http) -> 'aiohttp.ClientTimeout':
+        """Traduce los timeouts connect/read del HttpClient del target."""
+        return aiohttp.ClientTimeout(sock_connect=http.connect_timeout, sock_read=http.read_timeout)
+
+    def supports(self, target) -> bool:
+        """True si el target expone el envío en pasos (build_request/check_response)."""
+        return hasattr(target, 'build_request') and hasattr(target, 'check_response')
+
+    # --- Targets -----------------------------------------------------------
+
+    async def _send_target(self, target, records):
+        # select_record/finish leen y escriben el estado de agregación y
+        # rate limit (archivos JSON): fuera del event loop
+        record, result = await asyncio.to_thread(target.select_record, records)
+        if result is not None:
+            return result
+
+        request = target.build_request(record)
+        if request is None:
+            return target.unknown_service_result()
+
+        session = await self._get_session()
+        try:
+            async with session.request(request.method, request.url, json=request.json,
+                                       timeout=self._timeout(target.http)) as response:
+                text = await response.text()
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return await asyncio.to_thread(target.finish, record, False, str(e) or type(e).__name__)
+
+        if target.check_response(status, text):
+            return await asyncio.to_thread(target.finish, record, True)
+        return await asyncio.to_thread(target.finish, record, False, f"HTTP {status}: {text[:100]}")
+
+    def submit_target(self, target, records) -> Future:
+        """
+        Programa el envío de `records` a `target` en el event loop.
+
+        Retorna un concurrent.futures.Future con el TargetResult, para que el
+        dispatcher lo espere igual que a los targets que corren en threads.
+        Cancelar el future cancela el request.
+        """
+        return asyncio.run_coroutine_threadsafe(self._send_target(target, records), self._loop)
+
+    # --- Integraciones -----------------------------------------------------
+
+    async def _push_service(self, service, data) -> bool:
+        # can_push/estado pueden tocar la DB: fuera del event loop
+        if not await asyncio.to_thread(service.can_push):
+            logger.debug(f"[{service.name}] Skipping push (rate limit)")
+            return False
+
+        url = service.build_url(data)
+        session = await self._get_session()
+        try:
+            async with session.get(url, timeout=self._timeout(service.http)) as response:
+                text = await response.text()
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            await asyncio.to_thread(service.handle_error, str(e) or type(e).__name__)
+            return False
+
+        return await asyncio.to_thread(service.handle_response, data, status, text)
+
+    async def _push_services(self, services, data) -> Dict[str, bool]:
+        enabled = [s for s in services if s.enabled]
+        results = await asyncio.gather(*(self._push_service(s, data) for s in enabled),
+                                       return_exceptions=True)
+        out = {}
+        for service, result in zip(enabled, results):
+            if isinstance(result, BaseException):
+                service.log_error(str(result))
+                result = False
+            out[service.name] = result
+        return out
+
+    def push_services(self, services: List, data, timeout: Optional[float] = None) -> Dict[str, bool]:
+        """Envía `data` a todas las integraciones en paralelo (bloquea hasta terminar)."""
+        future = asyncio.run_coroutine_threadsafe(self._push_services(services, data), self._loop)
+        return future.result(timeout)
+
+    # -----------------------------------------------------------------------
+
+    def close(self):
+        """Cierra la sesión y detiene el event loop."""
+        async def _close():
+            if self._session is not None:
+                await self._session.close()
+
+        if self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(_close(), self._loop).result(5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
+
+
+_engine: Optional[AsyncDeliveryEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> AsyncDeliveryEngine:
+    """Retorna el motor compartido del proceso, creándolo si no existe."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AsyncDeliveryEngine()
+        return _engine
@@ -0,0 +1,180 @@
+"""
+Decodificador vectorizado (NumPy) para reprocesar paquetes en bloque.
+
+Pensado para re-decodificar cientos de miles de `raw_data` históricos
+cuando cambia un layout (ej. tipos 0x16/0x17): convierte los payloads en
+una matriz (N, bytes) uint8 y decodifica todos los campos de todos los
+tipos con máscaras, sin loop por paquete.
+
+Usa las mismas tablas de packet_decoder.PACKET_LAYOUTS, así que el
+resultado es idéntico al de `decode_hex` paquete por paquete.
+
+    batch = decode_batch(['215a3213...', ...])
+    batch['temp_c']        # numpy masked array (masked = None)
+    rows(batch)            # tuplas iguales a decode_hex() (None si inválido)
+
+NumPy es una dependencia opcional: sólo la necesita este módulo.
+"""
+from typing import Dict, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from packet_decoder import (
+    FIELDS, MIN_PACKET_BYTES, PACKET_LAYOUTS, TENTHS, RAIN_MM, WIND_DIR, UVI, logger,
+)
+
+# Tipos de cada columna (antes de enmascarar)
+COLUMN_DTYPES = {
+    'packet_type': np.int16,
+    'wind_dir': np.float64,
+    'light_wm2': np.float64,
+    'uvi': np.int16,
+    'temp_c': np.float64,
+    'humidity': np.int16,
+    'wind_speed_ms': np.float64,
+    'gust_ms': np.float64,
+    'rain_mm': np.float64,
+}
+
+# Tablas del decodificador escalar como arrays (gather vectorizado)
+_TENTHS = np.array(TENTHS, dtype=np.float64)
+_RAIN_MM = np.array(RAIN_MM, dtype=np.float64)
+_WIND_DIR = np.array(WIND_DIR, dtype=np.float64)
+_UVI = np.array(UVI, dtype=np.int16)
+
+
+def _lut(table) -> Tuple[np.ndarray, np.ndarray]:
+    """Convierte una tabla con None en (valores, máscara de None)."""
+    values = np.array([0 if v is None else v for v in table])
+    missing = np.array([v is None for v in table])
+    return values, missing
+
+
+_LAYOUTS = {
+    packet_type: (_lut(layout.temp), _lut(layout.humidity) if layout.humidity is not None else None)
+    for packet_type, layout in PACKET_LAYOUTS.items()
+}
+
+
+def to_matrix(payloads: Sequence[Union[str, bytes]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convierte payloads (hex de rtl_433 o bytes) en una matriz uint8.
+
+    Returns:
+        (matriz (N, ancho), válidos): las filas más cortas quedan con ceros
+        a la derecha; `válidos` aplica los mismos criterios que decode_hex
+        (hex de al menos 16 caracteres, hex válido, al menos 13 bytes).
+    """
+    n = len(payloads)
+    if n == 0:
+        return np.zeros((0, MIN_PACKET_BYTES), dtype=np.uint8), np.zeros(0, dtype=bool)
+
+    # Camino rápido: todos hex del mismo largo (el caso normal de rtl_433)
+    if all(isinstance(p, str) for p in payloads):
+        width = len(payloads[0])
+        if width >= 16 and width % 2 == 0 and all(len(p) == width for p in payloads):
+            try:
+                buf = bytes.fromhex(''.join(payloads))
+            except ValueError:
+                buf = b''
+            if len(buf) == n * (width // 2) and width // 2 >= MIN_PACKET_BYTES:
+                matrix = np.frombuffer(buf, dtype=np.uint8).reshape(n, width // 2)
+                return matrix, np.ones(n, dtype=bool)
+
+    # Camino general: fila por fila, con padding
+    rows = []
+    valid = np.zeros(n, dtype=bool)
+    for i, p in enumerate(payloads):
+        b = b''
+        if isinstance(p, str):
+            if len(p) >= 16:
+                try:
+                    b = bytes.fromhex(p)
+                except ValueError:
+                    b = b''
+        else:
+            b = bytes(p)
+        if len(b) >= MIN_PACKET_BYTES:
+            valid[i] = True
+        rows.append(b)
+
+    width = max(MIN_PACKET_BYTES, max(len(b) for b in rows))
+    matrix = np.zeros((n, width), dtype=np.uint8)
+    for i, b in enumerate(rows):
+        if valid[i]:
+            matrix[i, :len(b)] = np.frombuffer(b, dtype=np.uint8)
+    return matrix, valid
+
+
+def decode_matrix(matrix: np.ndarray, valid: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Decodifica una matriz (N, bytes) uint8.
+
+    Returns:
+        dict campo -> numpy masked array (masked = None), más 'valid' (bool).
+    """
+    n = matrix.shape[0]
+    if valid is None:
+        valid = np.ones(n, dtype=bool)
+
+    b = matrix
+    packet_type = b[:, 3].astype(np.int16)
+
+    values = {name: np.zeros(n, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+    masked = {name: ~valid.copy() for name in COLUMN_DTYPES}
+
+    # Campos comunes a todos los tipos
+    values['packet_type'] = packet_type
+    values['wind_dir'] = _WIND_DIR[b[:, 2]]
+    values['light_wm2'] = ((b[:, 10].astype(np.int64) << 8) | b[:, 11]) / 29
+    values['uvi'] = _UVI[b[:, 12]]
+
+    # Campos por tipo: por defecto ausentes, cada layout completa los suyos
+    for name in ('temp_c', 'humidity', 'wind_speed_ms', 'gust_ms', 'rain_mm'):
+        masked[name][:] = True
+
+    known = np.zeros(n, dtype=bool)
+    for ptype, ((temp, _), humidity) in _LAYOUTS.items():
+        rows = valid & (packet_type == ptype)
+        if not rows.any():
+            continue
+        known |= rows
+        values['temp_c'][rows] = temp[b[rows, 4]]
+        masked['temp_c'][rows] = False
+        if humidity is not None:
+            hum_values, hum_missing = humidity
+            values['humidity'][rows] = hum_values[b[rows, 5]]
+            masked['humidity'][rows] = hum_missing[b[rows, 5]]
+
+    values['wind_speed_ms'] = np.where(known, _TENTHS[b[:, 6]], 0.0)
+    values['gust_ms'] = np.where(known, _TENTHS[b[:, 7]], 0.0)
+    values['rain_mm'] = np.where(known, _RAIN_MM[b[:, 9]], 0.0)
+    for name in ('wind_speed_ms', 'gust_ms', 'rain_mm'):
+        masked[name] = ~known
+
+    unknown = valid & ~known
+    if unknown.any():
+        types = ', '.join(f"0x{t:02X}" for t in np.unique(packet_type[unknown]))
+        logger.warning(f"TIPO DESCONOCIDO en {int(unknown.sum())} paquetes ({types})")
+
+    result = {name: np.ma.MaskedArray(values[name], mask=masked[name]) for name in FIELDS}
+    result['valid'] = valid
+    return result
+
+
+def decode_batch(payloads: Sequence[Union[str, bytes]]) -> Dict[str, np.ndarray]:
+    """Decodifica una lista de payloads (hex o bytes). Ver decode_matrix."""
+    matrix, valid = to_matrix(payloads)
+    return decode_matrix(matrix, valid)
+
+
+def rows(batch: Dict[str, np.ndarray]) -> Iterator[Optional[tuple]]:
+    """
+    Itera el batch como tuplas en el orden de FIELDS, con tipos de Python.
+
+    Cada tupla es igual a la que retorna decode_hex para ese paquete
+    (None para los inválidos), lista para un execute_values.
+    """
+    columns = [batch[name].tolist() for name in FIELDS]
+    for i, ok in enumerate(batch['valid'].tolist()):
+        yield tuple(col[i] for col in columns) if ok else None
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark del decodificador de paquetes (packet_decoder.py).
+
+Mide paquetes/segundo de cada nivel de la API sobre un corpus sintético
+con todos los tipos de paquete (0x13-0x17):
+    decode_packet  hex -> dict
+    decode_hex     hex -> tupla
+    decode_bytes   bytes -> tupla
+    decode_batch   lista de hex -> columnas NumPy (si numpy está instalado)
+
+Uso: python3 bench/bench_decoder.py [--packets 100000] [--repeat 5]
+"""
+import os
+import sys
+import random
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from packet_decoder import decode_bytes, decode_hex, decode_packet, KNOWN_PACKET_TYPES
+
+
+def make_corpus(n: int, seed: int = 2900) -> list:
+    """Genera `n` paquetes hex de 18 bytes con tipos conocidos al azar."""
+    rng = random.Random(seed)
+    types = sorted(KNOWN_PACKET_TYPES)
+    corpus = []
+    for _ in range(n):
+        b = bytearray(rng.getrandbits(8) for _ in range(18))
+        b[0], b[1] = 0x21, 0x50 | (b[1] & 0x0F)
+        b[3] = rng.choice(types)
+        corpus.append(b.hex())
+    return corpus
+
+
+def bench(label: str, func, items: list, repeat: int):
+    """Corre `func` sobre todos los items y reporta el mejor de `repeat`."""
+    best = min(timeit.repeat(lambda: [func(x) for x in items], number=1, repeat=repeat))
+    rate = len(items) / best
+    print(f"{label:<16} {rate:>12,.0f} pkt/s   ({best * 1e6 / len(items):.2f} µs/pkt)")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del decodificador WH2900')
+    parser.add_argument('--packets', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.packets)
+    corpus_bytes = [bytes.fromhex(h) for h in corpus]
+
+    print(f"Corpus: {len(corpus):,} paquetes, tipos {', '.join(f'0x{t:02X}' for t in sorted(KNOWN_PACKET_TYPES))}")
+    bench('decode_packet', decode_packet, corpus, args.repeat)
+    bench('decode_hex', decode_hex, corpus, args.repeat)
+    bench('decode_bytes', decode_bytes, corpus_bytes, args.repeat)
+
+    try:
+        from batch_decoder import decode_batch
+    except ImportError:
+        print("decode_batch     (numpy no instalado)")
+        return
+    best = min(timeit.repeat(lambda: decode_batch(corpus), number=1, repeat=args.repeat))
+    print(f"{'decode_batch':<16} {len(corpus) / best:>12,.0f} pkt/s   ({best * 1e6 / len(corpus):.2f} µs/pkt)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark del camino JSON listener → processor (jsoncodec.py).
+
+Mide líneas/segundo sobre una grabación de rtl_433 (una línea JSON por
+paquete, p.ej. `rtl_433 ... -F json > captura.ndjson`) o, sin --capture,
+sobre un corpus sintético con el mismo formato:
+
+    listener roundtrip    loads + dumps del dict (comportamiento anterior)
+    listener passthrough  loads para validar + envelope de la línea original
+    processor loads       parseo de la captura en process_file
+
+para cada backend instalado (stdlib, orjson, simdjson).
+
+Uso: python3 bench/bench_json.py [--capture captura.ndjson] [--lines 100000] [--repeat 5]
+"""
+import os
+import sys
+import json
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import jsoncodec
+from corpus import make_captures
+
+
+def backends() -> dict:
+    """(loads, dumps) de cada librería instalada."""
+    encoder = json.JSONEncoder(separators=(',', ':'))
+    found = {'json': (json.loads, encoder.encode)}
+    try:
+        import orjson
+        found['orjson'] = (orjson.loads, lambda obj: orjson.dumps(obj).decode())
+    except ImportError:
+        pass
+    try:
+        import simdjson
+        found['simdjson'] = (simdjson.loads, encoder.encode)
+    except ImportError:
+        pass
+    return found
+
+
+def load_lines(path: str, n: int) -> list:
+    """Líneas JSON de la grabación (las que no son JSON, como los mensajes de rtl_433, se saltean)."""
+    lines = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('{'):
+                lines.append(line)
+    return lines[:n] if n else lines
+
+
+def synthetic_lines(n: int) -> list:
+    """Capturas sintéticas de bench/corpus.py (mismo espaciado que rtl_433)."""
+    return [text for _, text in make_captures(n)]
+
+
+def bench(label: str, func, lines: list, repeat: int) -> float:
+    best = min(timeit.repeat(lambda: func(lines), number=1, repeat=repeat))
+    rate = len(lines) / best
+    print(f"  {label:<22} {rate:>12,.0f} líneas/s   ({best * 1e6 / len(lines):.2f} µs/línea)")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del codec JSON')
+    parser.add_argument('--capture', help='Grabación NDJSON de rtl_433 (default: corpus sintético)')
+    parser.add_argument('--lines', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.capture:
+        lines = load_lines(args.capture, args.lines)
+        source = args.capture
+    else:
+        lines = synthetic_lines(args.lines)
+        source = 'sintético'
+    if not lines:
+        print("Sin líneas JSON en la captura")
+        return
+    name = 'wh2900_20260101_000000_000.json'
+    print(f"Corpus: {len(lines):,} líneas ({source}), jsoncodec usa {jsoncodec.BACKEND}")
+
+    for backend, (loads, dumps) in backends().items():
+        print(backend)
+
+        def roundtrip(items):
+            for line in items:
+                dumps({'file': name, 'data': loads(line)})
+
+        def passthrough(items):
+            for line in items:
+                loads(line)
+                f'{{"file":{dumps(name)},"data":{line}}}'
+
+        def parse(items):
+            for line in items:
+                loads(line)
+
+        bench('listener roundtrip', roundtrip, lines, args.repeat)
+        bench('listener passthrough', passthrough, lines, args.repeat)
+        bench('processor loads', parse, lines, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memoria de WeatherRecord.
+
+Compara los bytes por registro que quedan vivos en la lista `records` de
+un ciclo del processor:
+    dataclass  registro anterior: dataclass con el dict de rtl_433 en raw_json
+    slots      WeatherRecord actual: __slots__ + bytes JSON originales
+
+Usa tracemalloc sobre un corpus sintético de capturas RAW y Fineoffset
+(bench/corpus.py).
+
+Uso: python3 bench/bench_record_memory.py [--records 100000]
+"""
+import os
+import sys
+import json
+import argparse
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from wh2900_processor import process_capture
+from corpus import make_captures
+
+
+@dataclass
+class DataclassRecord:
+    """Layout anterior de WeatherRecord, para comparar."""
+    filepath: str
+    filename: str
+    fecha_medicion: datetime
+    raw_json: Dict[str, Any]
+    raw_data: str
+    rssi: Optional[float] = None
+    packet_type: Optional[int] = None
+    temp_c: Optional[float] = None
+    humidity: Optional[int] = None
+    wind_dir: Optional[float] = None
+    wind_speed_ms: Optional[float] = None
+    gust_ms: Optional[float] = None
+    rain_mm: Optional[float] = None
+    light_wm2: Optional[float] = None
+    uvi: Optional[int] = None
+    rain_1h_mm: Optional[float] = None
+    rain_24h_mm: Optional[float] = None
+    rain_day_mm: Optional[float] = None
+
+
+def build_dataclass(captures: list) -> list:
+    records = []
+    for filename, text in captures:
+        r = process_capture(json.loads(text), filename, filename)
+        records.append(DataclassRecord(
+            r.filepath, r.filename, r.fecha_medicion, r.raw_json, r.raw_data,
+            r.rssi, r.packet_type, r.temp_c, r.humidity, r.wind_dir,
+            r.wind_speed_ms, r.gust_ms, r.rain_mm, r.light_wm2, r.uvi,
+        ))
+    return records
+
+
+def build_slots(captures: list) -> list:
+    records = []
+    for filename, text in captures:
+        raw = text.encode()  # lo que process_file lee del archivo
+        records.append(process_capture(json.loads(raw), filename, filename, raw))
+    return records
+
+
+def measure(label: str, build, captures: list) -> float:
+    """Bytes por registro que quedan asignados después de construir la lista."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = build(captures)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    per_record = (after - before) / len(records)
+    print(f"{label:<10} {per_record:>8,.0f} bytes/registro   ({(after - before) / 2**20:,.1f} MiB)")
+    del records
+    return per_record
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de memoria de WeatherRecord')
+    parser.add_argument('--records', type=int, default=100_000)
+    args = parser.parse_args()
+
+    captures = make_captures(args.records)
+    print(f"Corpus: {len(captures):,} capturas ({sum(len(c[1]) for c in captures) / len(captures):.0f} bytes JSON promedio)")
+    # filename es compartido con el corpus en ambos casos; los bytes JSON cuentan en slots
+    old = measure('dataclass', build_dataclass, captures)
+    new = measure('slots', build_slots, captures)
+    print(f"Reducción: {(1 - new / old) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
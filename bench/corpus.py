@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Generador de capturas sintéticas de rtl_433 para benchmarks.
+
+Arma una serie temporal realista (una transmisión cada 16s) con los dos
+formatos que recibe el processor:
+    RAW               {"model": "wh2900", "rows": [{"data": "<hex>"}], ...}
+                      con todos los tipos de paquete 0x13-0x17 en rotación
+    Fineoffset-WH65B  campos ya decodificados, rain_mm como acumulador total
+
+Los bytes de cada paquete RAW se codifican con las mismas fórmulas que
+decodifica packet_decoder (temperatura/humedad según el tipo, viento en
+décimas, luz * 29, UVI), así que los valores decodificados son plausibles.
+Con `repeats` > 1 cada transmisión se repite en el mismo segundo, como
+hace rtl_433 (sirve para medir dedup).
+
+    python3 bench/corpus.py /tmp/corpus --count 100000
+    python3 bench/corpus.py /tmp/corpus --count 100000 --format journal --repeats 3
+
+Desde Python:
+    captures = make_captures(1000)             # [(filename, texto JSON), ...]
+    write_corpus('/tmp/corpus', 1000)          # archivos wh2900_*.json
+"""
+import os
+import sys
+import json
+import math
+import random
+import argparse
+from datetime import datetime, timezone
+from typing import Iterator, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from packet_decoder import KNOWN_PACKET_TYPES
+
+PACKET_TYPES = sorted(KNOWN_PACKET_TYPES)  # 0x13-0x17
+START_EPOCH = 1_760_000_000
+INTERVAL = 16  # segundos entre transmisiones del sensor
+# rtl_433 escribe "clave" : valor
+RTL_SEPARATORS = (', ', ' : ')
+
+
+def _weather(rng: random.Random, ts: int) -> dict:
+    """Valores con ciclo diario (temperatura, luz) y ruido."""
+    day = (ts % 86400) / 86400
+    sun = max(0.0, math.sin((day - 0.25) * 2 * math.pi))
+    wind = max(0.0, rng.gauss(2.5, 1.5))
+    return {
+        'temp_c': 15 + 8 * math.sin((day - 0.375) * 2 * math.pi) + rng.gauss(0, 0.3),
+        'humidity': min(99, max(10, int(70 - 25 * sun + rng.gauss(0, 3)))),
+        'wind_dir': rng.randrange(16),
+        'wind': wind,
+        'gust': wind + abs(rng.gauss(1.0, 0.8)),
+        'light': 900 * sun * rng.uniform(0.6, 1.0),
+        'uvi': min(15, int(11 * sun)),
+    }
+
+
+def make_packet(rng: random.Random, packet_type: int, w: dict, rain_nibble: int = 0) -> str:
+    """Paquete RAW de 18 bytes (hex) del tipo indicado."""
+    b = bytearray(rng.getrandbits(8) for _ in range(18))
+    b[0], b[1] = 0x21, 0x50 | (b[1] & 0x0F)
+    b[2] = (b[2] & 0xF0) | w['wind_dir']
+    b[3] = packet_type
+    if packet_type in (0x13, 0x14):
+        # temp = (b4 - 10) / 10  → rango -1.0 a 24.5 °C
+        b[4] = min(255, max(0, round(w['temp_c'] * 10) + 10))
+        b[5] = min(127, max(0, w['humidity'] - 32))  # 0x13: hum = b5 + 32
+    else:
+        # temp = (b4 + 100) / 10  → rango 10.0 a 35.5 °C
+        b[4] = min(255, max(0, round(w['temp_c'] * 10) - 100))
+        b[5] = w['humidity'] + 10
+    b[6] = min(255, round(w['wind'] * 10))
+    b[7] = min(255, round(w['gust'] * 10))
+    b[9] = (b[9] & 0xF0) | (rain_nibble & 0x0F)
+    light = min(0xFFFF, round(w['light'] * 29))
+    b[10], b[11] = light >> 8, light & 0xFF
+    b[12] = (w['uvi'] << 4) | (b[12] & 0x0F)
+    return b.hex()
+
+
+def iter_captures(count: int, fineoffset_ratio: float = 0.2, repeats: int = 1,
+                  seed: int = 2900, start: int = START_EPOCH) -> Iterator[Tuple[str, str]]:
+    """
+    Genera `count` capturas como (filename, texto JSON de rtl_433).
+
+    Una de cada 1/fineoffset_ratio transmisiones es Fineoffset-WH65B; el
+    resto son RAW con el tipo de paquete en rotación 0x13-0x17.
+    """
+    rng = random.Random(seed)
+    every = round(1 / fineoffset_ratio) if fineoffset_ratio > 0 else 0
+    rain_total = 300.0
+    produced = 0
+    tx = 0
+    raw_tx = 0
+    while produced < count:
+        ts = start + tx * INTERVAL
+        time_str = datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        w = _weather(rng, ts)
+        raining = rng.random() < 0.05
+        if raining:
+            rain_total += 0.1 * rng.randint(1, 3)
+
+        if every and tx % every == 0:
+            data = {
+                'time': time_str, 'model': 'Fineoffset-WH65B', 'id': 12, 'battery_ok': 1,
+                'temperature_C': round(w['temp_c'], 1), 'humidity': w['humidity'],
+                'wind_dir_deg': w['wind_dir'] * 22.5, 'wind_avg_m_s': round(w['wind'], 1),
+                'wind_max_m_s': round(w['gust'], 1), 'rain_mm': round(rain_total, 1),
+                'uv': w['uvi'] * 10, 'uvi': w['uvi'], 'light_lux': round(w['light'] * 126, 1),
+                'mic': 'CRC',
+            }
+        else:
+            packet_type = PACKET_TYPES[raw_tx % len(PACKET_TYPES)]
+            raw_tx += 1
+            hex_data = make_packet(rng, packet_type, w, rng.randint(1, 3) if raining else 0)
+            data = {
+                'time': time_str, 'model': 'wh2900', 'count': 1, 'num_rows': 1,
+                'rows': [{'len': 144, 'data': hex_data}], 'codes': ['{144}' + hex_data],
+            }
+
+        for r in range(repeats):
+            if produced >= count:
+                break
+            data['rssi'] = round(rng.uniform(-20, -1), 1)
+            ms = (r * 150) % 1000
+            filename = f"wh2900_{datetime.fromtimestamp(ts, timezone.utc).strftime('%Y%m%d_%H%M%S')}_{ms:03d}.json"
+            yield filename, json.dumps(data, separators=RTL_SEPARATORS)
+            produced += 1
+        tx += 1
+
+
+def make_captures(count: int, fineoffset_ratio: float = 0.2, repeats: int = 1,
+                  seed: int = 2900) -> List[Tuple[str, str]]:
+    """Lista de `count` capturas (ver iter_captures)."""
+    return list(iter_captures(count, fineoffset_ratio, repeats, seed))
+
+
+def write_corpus(out_dir: str, count: int, fineoffset_ratio: float = 0.2, repeats: int = 1,
+                 seed: int = 2900, fmt: str = 'files', segment_lines: int = 2500) -> int:
+    """
+    Escribe el corpus en `out_dir`.
+
+    fmt = 'files'    un wh2900_*.json por captura (como el listener)
+    fmt = 'journal'  segmentos sellados journal_*.ndjson de `segment_lines` líneas
+
+    Returns:
+        Cantidad de capturas escritas.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    written = 0
+    segment = None
+    for filename, text in iter_captures(count, fineoffset_ratio, repeats, seed):
+        if fmt == 'journal':
+            if written % segment_lines == 0:
+                if segment is not None:
+                    segment.close()
+                seg_id = filename[len('wh2900_'):-len('.json')]
+                segment = open(os.path.join(out_dir, f'journal_{seg_id}.ndjson'), 'w')
+            segment.write(f'{{"file":{json.dumps(filename)},"data":{text}}}\n')
+        else:
+            with open(os.path.join(out_dir, filename), 'w') as f:
+                f.write(text)
+        written += 1
+    if segment is not None:
+        segment.close()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera capturas sintéticas de rtl_433')
+    parser.add_argument('out_dir')
+    parser.add_argument('--count', type=int, default=10_000)
+    parser.add_argument('--fineoffset-ratio', type=float, default=0.2,
+                        help='Fracción de transmisiones Fineoffset-WH65B (default: 0.2)')
+    parser.add_argument('--repeats', type=int, default=1, help='Copias de cada transmisión (rtl_433 repite)')
+    parser.add_argument('--format', choices=('files', 'journal'), default='files')
+    parser.add_argument('--seed', type=int, default=2900)
+    args = parser.parse_args()
+
+    n = write_corpus(args.out_dir, args.count, args.fineoffset_ratio, args.repeats, args.seed, args.format)
+    print(f"{n:,} capturas escritas en {args.out_dir} ({args.format})")
+
+
+if __name__ == "__main__":
+    main()
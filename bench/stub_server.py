@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP local que imita a los servicios de clima, para pruebas y benchmarks.
+
+Responde como cada servicio real (por path) sin salir de la máquina:
+    /set/...                                     Weathercloud       200
+    /weatherstation/updateweatherstation.php     Weather Underground 200 "success"
+    /pwsupdate/pwsupdate.php                     PWSweather         200 "success"
+    /upload/api.php                              Windguru           200 "OK"
+    /pws/update/<key>                            Windy              200 JSON
+    /data/3.0/measurements                       OpenWeatherMap     204
+    cualquier otro                               webhook genérico   200
+
+Para apuntar un target al stub, en su sección del INI:
+    endpoint = http://127.0.0.1:8765
+
+Uso: python3 bench/stub_server.py [--port 8765] [--delay 0.2] [--fail-rate 0.1]
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+def _response_for(path: str):
+    """Retorna (status, content_type, body) según el servicio que imita el path."""
+    if path.startswith('/weatherstation/') or path.startswith('/pwsupdate/'):
+        return 200, 'text/plain', b'success\n'
+    if path.startswith('/upload/api.php'):
+        return 200, 'text/plain', b'OK'
+    if path.startswith('/pws/update/'):
+        body = {'update': {'update': {'observations': 1}, 'errors': {}}}
+        return 200, 'application/json', json.dumps(body).encode()
+    if path.startswith('/data/3.0/measurements'):
+        return 204, 'text/plain', b''
+    return 200, 'text/plain', b'OK'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Handler que responde como el servicio correspondiente al path."""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, como los servicios reales
+    # Headers y body salen en writes separados: sin TCP_NODELAY el delayed ACK
+    # del cliente agrega ~40ms a cada respuesta con body
+    disable_nagle_algorithm = True
+    delay = 0.0
+    fail_rate = 0.0
+    counter_lock = threading.Lock()
+    requests_seen = 0
+
+    def _handle(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+        with StubHandler.counter_lock:
+            StubHandler.requests_seen += 1
+
+        if self.delay:
+            time.sleep(self.delay)
+
+        if self.fail_rate and random.random() < self.fail_rate:
+            status, ctype, body = 503, 'text/plain', b'stub: falla simulada'
+        else:
+            status, ctype, body = _response_for(urlsplit(self.path).path)
+
+        self.send_response(status)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    do_GET = _handle
+    do_POST = _handle
+
+    def log_message(self, fmt, *args):
+        pass  # silencioso: se usa en benchmarks
+
+
+def start(port: int = 0, delay: float = 0.0, fail_rate: float = 0.0) -> ThreadingHTTPServer:
+    """
+    Levanta el stub en un thread daemon y lo retorna.
+
+    Con port=0 elige un puerto libre: `server.server_address[1]`.
+    """
+    handler = type('Handler', (StubHandler,), {'delay': delay, 'fail_rate': fail_rate})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='wh2900-stub', daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub local de servicios de clima')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help='Latencia simulada por request (segundos)')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fracción de requests que responden 503')
+    args = parser.parse_args()
+
+    server = start(args.port, args.delay, args.fail_rate)
+    print(f"Stub escuchando en http://127.0.0.1:{server.server_address[1]} (Ctrl+C para salir)")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks del pipeline WH2900, con resultados en JSON por commit.
+
+Casos (cada uno corre en un proceso aparte, así el pico de RSS es propio):
+    decode_packet  hex -> dict, por paquete
+    process_file   lectura + parseo + decodificación de un archivo de captura
+    rain           RainCalculator.step + rain_totals por lectura Fineoffset
+    targets        send() de cada target contra el stub HTTP local
+                   (curlpost y cada servicio http_post; postgres con --pg-dsn)
+    main           wh2900_processor.main() completo sobre un capture_dir
+
+El corpus lo genera bench/corpus.py (RAW 0x13-0x17 + Fineoffset-WH65B).
+Para cada caso se reporta throughput, latencia p50/p99 y pico de RSS.
+
+    python3 bench/suite.py                         # todo, guarda bench/results/<commit>.json
+    python3 bench/suite.py --records 20000 --cases decode_packet,main
+    python3 bench/suite.py --compare bench/results/abc1234.json            # corre y compara
+    python3 bench/suite.py --compare bench/results/abc1234.json nuevo.json
+
+Una diferencia peor que --threshold (10% por defecto) en throughput, p99
+o RSS se marca como regresión y el comando sale con código 1.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+CASES = ('decode_packet', 'process_file', 'rain', 'targets', 'main')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+HTTP_SERVICES = ('weathercloud', 'wunderground', 'pwsweather', 'windguru', 'windy', 'openweathermap')
+
+
+# --- Métricas ---------------------------------------------------------------
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies_ns: List[int], elapsed: float, items: Optional[int] = None) -> Dict:
+    """Métricas de un caso: `latencies_ns` por operación, `elapsed` total en segundos."""
+    values = sorted(latencies_ns)
+    items = items if items is not None else len(values)
+    return {
+        'items': items,
+        'seconds': round(elapsed, 4),
+        'per_sec': round(items / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_us': round(percentile(values, 50) / 1000, 2),
+        'p99_us': round(percentile(values, 99) / 1000, 2),
+    }
+
+
+def timed(func, items) -> Dict:
+    """Corre `func` por cada item midiendo cada llamada."""
+    latencies = []
+    clock = time.perf_counter_ns
+    started = clock()
+    for item in items:
+        t0 = clock()
+        func(item)
+        latencies.append(clock() - t0)
+    return summarize(latencies, (clock() - started) / 1e9)
+
+
+def peak_rss_kb() -> int:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss  # macOS reporta bytes
+
+
+# --- Casos ------------------------------------------------------------------
+
+def case_decode_packet(args, workdir: str) -> Dict:
+    from corpus import iter_captures
+    from packet_decoder import decode_packet
+
+    packets = []
+    for _, text in iter_captures(args.records, fineoffset_ratio=0):
+        packets.append(json.loads(text)['rows'][0]['data'])
+    return timed(decode_packet, packets)
+
+
+def case_process_file(args, workdir: str) -> Dict:
+    from corpus import write_corpus
+    from wh2900_processor import process_file
+
+    capture_dir = os.path.join(workdir, 'captures')
+    write_corpus(capture_dir, args.records)
+    files = sorted(os.path.join(capture_dir, name) for name in os.listdir(capture_dir))
+    return timed(process_file, files)
+
+
+def case_rain(args, workdir: str) -> Dict:
+    from corpus import iter_captures
+    from wh2900_processor import process_capture
+    from rain_state import RainCalculator
+
+    records = []
+    for filename, text in iter_captures(args.records, fineoffset_ratio=1.0):
+        records.append(process_capture(json.loads(text), '', filename))
+
+    rain = RainCalculator(os.path.join(workdir, 'rain_state.json'))
+
+    def step(record):
+        rain.step(record.fecha_medicion, record.rain_mm)
+        rain.rain_totals(record.fecha_medicion)
+
+    result = timed(step, records)
+    started = time.perf_counter()
+    rain.save()
+    result['save_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def _target_configs(args, workdir: str, port: int) -> Dict[str, Dict]:
+    """Configuración de cada target apuntando al stub (o a la DB de --pg-dsn)."""
+    common = {'rate_limit_file': os.path.join(workdir, 'rate_limit.json'), 'min_interval': '0'}
+    configs = {'curlpost': {'type': 'curlpost', 'url': f'http://127.0.0.1:{port}/hook'}}
+    for service in HTTP_SERVICES:
+        configs[service] = dict(common, type='http_post', service=service,
+                                endpoint=f'http://127.0.0.1:{port}',
+                                id_env='WH2900_BENCH_ID', key_env='WH2900_BENCH_KEY')
+    if args.pg_dsn:
+        configs['postgres'] = dict((kv.split('=', 1) for kv in args.pg_dsn.split()), type='postgres')
+    return configs
+
+
+def case_targets(args, workdir: str) -> Dict:
+    import stub_server
+    from corpus import iter_captures
+    from wh2900_processor import process_capture
+    from targets import get_target_class
+
+    os.environ.setdefault('WH2900_BENCH_ID', 'bench')
+    os.environ.setdefault('WH2900_BENCH_KEY', 'bench')
+    server = stub_server.start()
+    port = server.server_address[1]
+
+    # Un lote de registros por send, como en un ciclo del processor
+    batch = []
+    for filename, text in iter_captures(args.batch):
+        batch.append(process_capture(json.loads(text), '', filename))
+
+    results = {}
+    try:
+        for name, config in _target_configs(args, workdir, port).items():
+            target = get_target_class(config['type'])(name, config)
+            if not target.active:
+                results[name] = {'skipped': 'target inactivo'}
+                continue
+            failures = []
+
+            def send(_):
+                result = target.send(batch)
+                if not result.success:
+                    failures.append(result.message)
+
+            summary = timed(send, range(args.sends))
+            summary['records_per_send'] = len(batch)
+            summary['failures'] = len(failures)
+            results[name] = summary
+    finally:
+        server.shutdown()
+    return results
+
+
+MAIN_INI = """[general]
+capture_dir = {capture_dir}
+delete_policy = all
+rain_state_file = {workdir}/rain_state.json
+rate_limit_file = {workdir}/rate_limit.json
+chunk_size = {chunk_size}
+
+[target_hook]
+type = curlpost
+url = http://127.0.0.1:{port}/hook
+
+[target_weathercloud]
+type = http_post
+service = weathercloud
+id_env = WH2900_BENCH_ID
+key_env = WH2900_BENCH_KEY
+endpoint = http://127.0.0.1:{port}
+min_interval = 0
+"""
+
+
+def case_main(args, workdir: str) -> Dict:
+    import stub_server
+    from corpus import write_corpus
+    import wh2900_processor
+
+    os.environ.setdefault('WH2900_BENCH_ID', 'bench')
+    os.environ.setdefault('WH2900_BENCH_KEY', 'bench')
+    server = stub_server.start()
+    capture_dir = os.path.join(workdir, 'captures')
+    ini = os.path.join(workdir, 'bench.ini')
+    with open(ini, 'w') as f:
+        f.write(MAIN_INI.format(capture_dir=capture_dir, workdir=workdir,
+                                chunk_size=args.chunk_size, port=server.server_address[1]))
+
+    latencies = []
+    elapsed = 0.0
+    try:
+        for _ in range(args.main_runs):
+            # Cada corrida empieza de cero: capturas nuevas y sin estado
+            shutil.rmtree(capture_dir, ignore_errors=True)
+            for name in ('rain_state.json', 'rate_limit.json'):
+                try:
+                    os.remove(os.path.join(workdir, name))
+                except FileNotFoundError:
+                    pass
+            write_corpus(capture_dir, args.records)
+            started = time.perf_counter_ns()
+            wh2900_processor.main([ini])
+            took = time.perf_counter_ns() - started
+            latencies.append(took)
+            elapsed += took / 1e9
+            left = len(os.listdir(capture_dir))
+            if left:
+                raise RuntimeError(f"main() dejó {left} capturas sin procesar")
+    finally:
+        server.shutdown()
+
+    # Latencia = duración de cada corrida completa; throughput en capturas/s
+    result = summarize(latencies, elapsed, args.records * args.main_runs)
+    result['runs'] = args.main_runs
+    result['chunk_size'] = args.chunk_size
+    return result
+
+
+CASE_FUNCS = {
+    'decode_packet': case_decode_packet,
+    'process_file': case_process_file,
+    'rain': case_rain,
+    'targets': case_targets,
+    'main': case_main,
+}
+
+
+# --- Ejecución ----------------------------------------------------------------
+
+def run_case(case: str, args) -> Dict:
+    """Corre un caso en un proceso nuevo y retorna sus métricas."""
+    with tempfile.TemporaryDirectory(prefix=f'wh2900-bench-{case}-') as workdir:
+        out = os.path.join(workdir, 'result.json')
+        env = dict(os.environ, WH2900_LOG_DIR=os.path.join(workdir, 'log'))
+        cmd = [sys.executable, os.path.abspath(__file__), '--child', case, '--child-out', out,
+               '--records', str(args.records), '--sends', str(args.sends), '--batch', str(args.batch),
+               '--main-runs', str(args.main_runs), '--chunk-size', str(args.chunk_size)]
+        if args.pg_dsn:
+            cmd += ['--pg-dsn', args.pg_dsn]
+        proc = subprocess.run(cmd, env=env, cwd=workdir, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        if proc.returncode != 0:
+            return {'error': proc.stdout.strip().splitlines()[-1] if proc.stdout.strip() else f'exit {proc.returncode}'}
+        with open(out) as f:
+            return json.load(f)
+
+
+def child(case: str, out: str, args):
+    """Proceso hijo: corre el caso y escribe sus métricas + pico de RSS."""
+    import logging
+    logging.disable(logging.INFO)  # el processor loguea cada lote y cada push
+    workdir = os.path.dirname(out)
+    result = CASE_FUNCS[case](args, workdir)
+    result['peak_rss_kb'] = peak_rss_kb()
+    with open(out, 'w') as f:
+        json.dump(result, f)
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_case(name: str, m: Dict):
+    if 'error' in m or 'skipped' in m:
+        print(f"{name:<28} {m.get('error') or m.get('skipped')}")
+        return
+    rss = f"{m['peak_rss_kb'] / 1024:>7.1f} MiB" if 'peak_rss_kb' in m else ''
+    print(f"{name:<28} {m['per_sec']:>12,.0f}/s   p50 {m['p50_us']:>10,.1f}µs   p99 {m['p99_us']:>10,.1f}µs   {rss}")
+
+
+def print_results(results: Dict):
+    print(f"commit {results['commit']}  python {results['python']}  json {results['json_backend']}  "
+          f"records {results['records']:,}")
+    for case, metrics in results['cases'].items():
+        if case == 'targets' and 'error' not in metrics:
+            for target, m in metrics.items():
+                if target != 'peak_rss_kb':
+                    print_case(f"targets.{target}", dict(m, peak_rss_kb=metrics['peak_rss_kb']))
+        else:
+            print_case(case, metrics)
+
+
+def _flatten(results: Dict) -> Dict[str, Dict]:
+    flat = {}
+    for case, metrics in results['cases'].items():
+        if case == 'targets' and 'error' not in metrics:
+            for target, m in metrics.items():
+                if isinstance(m, dict):
+                    flat[f'targets.{target}'] = dict(m, peak_rss_kb=metrics.get('peak_rss_kb'))
+        else:
+            flat[case] = metrics
+    return flat
+
+
+def compare(base: Dict, new: Dict, threshold: float) -> int:
+    """Imprime la variación por caso y retorna la cantidad de regresiones."""
+    print(f"{base['commit']} -> {new['commit']}")
+    regressions = 0
+    old_cases, new_cases = _flatten(base), _flatten(new)
+    # (métrica, más alto es mejor)
+    metrics = (('per_sec', True), ('p50_us', False), ('p99_us', False), ('peak_rss_kb', False))
+    for name in sorted(set(old_cases) & set(new_cases)):
+        old, cur = old_cases[name], new_cases[name]
+        parts = []
+        for metric, higher_is_better in metrics:
+            if not old.get(metric) or cur.get(metric) is None:
+                continue
+            change = (cur[metric] - old[metric]) / old[metric]
+            worse = -change if higher_is_better else change
+            flag = ''
+            # p50 es informativo: el ruido de una sola corrida lo mueve mucho
+            if worse > threshold and metric != 'p50_us':
+                flag = ' !'
+                regressions += 1
+            parts.append(f"{metric} {change * 100:+6.1f}%{flag}")
+        print(f"{name:<28} {'   '.join(parts)}")
+    if regressions:
+        print(f"{regressions} regresiones (> {threshold * 100:g}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Suite de benchmarks WH2900')
+    parser.add_argument('--cases', default=','.join(CASES), help=f"Casos separados por coma ({','.join(CASES)})")
+    parser.add_argument('--records', type=int, default=100_000, help='Capturas del corpus por caso')
+    parser.add_argument('--sends', type=int, default=200, help='send() por target')
+    parser.add_argument('--batch', type=int, default=100, help='Registros por send() en el caso targets')
+    parser.add_argument('--main-runs', type=int, default=3, help='Corridas de main()')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='chunk_size del caso main')
+    parser.add_argument('--pg-dsn', default='', help='"host=... dbname=... user=..." para medir el target postgres')
+    parser.add_argument('--output', help='JSON de resultados (default: bench/results/<commit>.json)')
+    parser.add_argument('--compare', nargs='+', metavar='JSON',
+                        help='Compara contra BASE (corriendo la suite) o BASE NUEVO sin correr')
+    parser.add_argument('--threshold', type=float, default=0.10)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--child-out', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.child_out, args)
+        return
+
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        sys.exit(1 if compare(base, new, args.threshold) else 0)
+
+    import jsoncodec
+    cases = [c.strip() for c in args.cases.split(',') if c.strip()]
+    unknown = [c for c in cases if c not in CASE_FUNCS]
+    if unknown:
+        parser.error(f"casos desconocidos: {', '.join(unknown)}")
+
+    results = {
+        'commit': git_commit(),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'json_backend': jsoncodec.BACKEND,
+        'records': args.records,
+        'cases': {},
+    }
+    for case in cases:
+        print(f"... {case}", file=sys.stderr, flush=True)
+        results['cases'][case] = run_case(case, args)
+
+    print_results(results)
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Resultados: {output}")
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        print()
+        sys.exit(1 if compare(base, results, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Journal de capturas: segmentos NDJSON append-only en vez de un JSON por paquete.
+
+El listener agrega cada paquete como una línea al segmento activo
+(`journal_YYYYmmdd_HHMMSS.ndjson.open`). Cuando el segmento supera
+`max_bytes` o `max_age` segundos se sella renombrándolo a `.ndjson`:
+el sufijo es el marcador de segmento sellado.
+
+El processor lee los segmentos en orden, secuencialmente, y guarda hasta
+dónde consumió en un archivo de offset. Los segmentos sellados que quedan
+consumidos por completo se borran al confirmar (commit).
+
+Formato de cada línea:
+    {"file": "wh2900_YYYYmmdd_HHMMSS_mmm.json", "data": {...json de rtl_433...}}
+
+`file` conserva el nombre que tendría el archivo individual, que sigue
+siendo la clave (filename) en dataraw/medicion.
+"""
+import os
+import json
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import jsoncodec
+
+JOURNAL_DIR = '/var/log/wh2900/journal'
+SEGMENT_PREFIX = 'journal_'
+SEALED_SUFFIX = '.ndjson'
+OPEN_SUFFIX = '.ndjson.open'
+OFFSET_FILE = 'journal.offset'
+
+DEFAULT_MAX_BYTES = 1024 * 1024  # 1 MiB (~2500 paquetes)
+DEFAULT_MAX_AGE = 3600  # 1 hora
+
+
+def capture_filename(now: Optional[datetime] = None) -> str:
+    """
+    Nombre de captura con el mismo formato que los archivos individuales.
+
+    Siempre en UTC: el processor ordena por nombre y un cambio de horario
+    (o pasar de un listener a otro) no debe hacer retroceder los nombres.
+    """
+    now = now or datetime.now(timezone.utc)
+    return f"wh2900_{now.strftime('%Y%m%d_%H%M%S')}_{now.strftime('%f')[:3]}.json"
+
+
+def write_capture(capture_dir: str, filename: str, data: Union[Dict, str]) -> str:
+    """
+    Escribe una captura individual de forma atómica (tmp oculto + rename).
+
+    El processor nunca ve un JSON a medio escribir y, en modo --daemon con
+    watch, el rename dispara IN_MOVED_TO con el archivo ya completo.
+    `data` puede ser el JSON ya serializado (la línea de rtl_433 tal cual).
+    """
+    filepath = os.path.join(capture_dir, filename)
+    tmp = os.path.join(capture_dir, f".{filename}.tmp")
+    with open(tmp, 'w') as f:
+        f.write(data if isinstance(data, str) else jsoncodec.dumps(data))
+    os.replace(tmp, filepath)
+    return filepath
+
+
+def _segment_id(filename: str) -> Optional[str]:
+    """Retorna el id del segmento (sin sufijo) o None si no es un segmento."""
+    if not filename.startswith(SEGMENT_PREFIX):
+        return None
+    if filename.endswith(OPEN_SUFFIX):
+        return filename[:-len(OPEN_SUFFIX)]
+    if filename.endswith(SEALED_SUFFIX):
+        return filename[:-len(SEALED_SUFFIX)]
+    return None
+
+
+def list_segments(journal_dir: str) -> List[Tuple[str, bool]]:
+    """Lista (segment_id, sellado) ordenados cronológicamente."""
+    segments = {}
+    try:
+        with os.scandir(journal_dir) as it:
+            for entry in it:
+                seg_id = _segment_id(entry.name)
+                if seg_id is None:
+                    continue
+                sealed = entry.name.endswith(SEALED_SUFFIX) and not entry.name.endswith(OPEN_SUFFIX)
+                segments[seg_id] = segments.get(seg_id, False) or sealed
+    except FileNotFoundError:
+        return []
+    return sorted(segments.items())
+
+
+class JournalWriter:
+    """Escribe paquetes al segmento activo y rota por tamaño/tiempo."""
+
+    def __init__(self, journal_dir: str = JOURNAL_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age: float = DEFAULT_MAX_AGE):
+        self.journal_dir = journal_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._file = None
+        self._seg_id: Optional[str] = None
+        self._opened_at = 0.0
+        self._size = 0
+
+        os.makedirs(journal_dir, exist_ok=True)
+        # Segmentos abiertos que quedaron de una ejecución anterior (crash,
+        # reinicio): ya nadie les va a escribir, se sellan.
+        for seg_id, sealed in list_segments(journal_dir):
+            if not sealed:
+                self._seal(seg_id)
+
+    def _path(self, seg_id: str, suffix: str) -> str:
+        return os.path.join(self.journal_dir, seg_id + suffix)
+
+    def _seal(self, seg_id: str):
+        try:
+            os.rename(self._path(seg_id, OPEN_SUFFIX), self._path(seg_id, SEALED_SUFFIX))
+        except OSError:
+            pass
+
+    def _last_segment_id(self) -> str:
+        """Mayor id entre los segmentos del directorio y el último confirmado por el reader."""
+        last = max((seg_id for seg_id, _ in list_segments(self.journal_dir)), default='')
+        try:
+            with open(os.path.join(self.journal_dir, OFFSET_FILE)) as f:
+                last = max(last, json.load(f).get('segment', ''))
+        except (OSError, ValueError, AttributeError):
+            pass
+        return last
+
+    def _open_segment(self):
+        # UTC, igual que capture_filename: el reader ordena los ids como strings
+        seg_id = f"{SEGMENT_PREFIX}{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}"
+        base = seg_id
+        n = 1
+        last = self._last_segment_id()
+        if seg_id <= last:
+            # Reloj atrasado (o segmentos de antes en hora local): el reader
+            # saltearía este segmento, se sigue después del último
+            base = last
+            seg_id = f"{base}_{n}"
+            n += 1
+        # Evitar colisión si se rota dos veces en el mismo segundo
+        while os.path.exists(self._path(seg_id, OPEN_SUFFIX)) or os.path.exists(self._path(seg_id, SEALED_SUFFIX)):
+            seg_id = f"{base}_{n}"
+            n += 1
+        self._file = open(self._path(seg_id, OPEN_SUFFIX), 'a', encoding='utf-8')
+        self._seg_id = seg_id
+        self._opened_at = time.monotonic()
+        self._size = 0
+
+    def rotate(self):
+        """Sella el segmento activo (el próximo append abre uno nuevo)."""
+        if self._file is None:
+            return
+        self._file.close()
+        self._seal(self._seg_id)
+        self._file = None
+        self._seg_id = None
+
+    def append(self, name: str, data: Union[Dict, str]) -> str:
+        """
+        Agrega un paquete al journal (dict o JSON ya serializado).
+        Retorna el nombre de captura usado.
+        """
+        line = jsoncodec.envelope(name, data) + '\n'
+        self._write(line)
+        return name
+
+    def _write(self, line: str):
+        if self._file is not None and (
+                self._size >= self.max_bytes or time.monotonic() - self._opened_at >= self.max_age):
+            self.rotate()
+        if self._file is None:
+            self._open_segment()
+        self._file.write(line)
+        # flush por línea: el processor puede leer el segmento activo
+        self._file.flush()
+        self._size += len(line)
+
+    def close(self):
+        self.rotate()
+
+
+class JournalReader:
+    """Consume segmentos del journal en orden, con offset persistente."""
+
+    def __init__(self, journal_dir: str = JOURNAL_DIR, offset_file: Optional[str] = None):
+        self.journal_dir = journal_dir
+        self.offset_file = offset_file or os.path.join(journal_dir, OFFSET_FILE)
+        self._committed = self._load_offset()
+        self._pending: Optional[Tuple[str, int]] = None
+
+    def _load_offset(self) -> Tuple[str, int]:
+        try:
+            with open(self.offset_file, 'r') as f:
+                data = json.load(f)
+                return data.get('segment', ''), int(data.get('offset', 0))
+        except (OSError, ValueError):
+            return '', 0
+
+    def _segment_path(self, seg_id: str, sealed: bool) -> str:
+        return os.path.join(self.journal_dir, seg_id + (SEALED_SUFFIX if sealed else OPEN_SUFFIX))
+
+    def read(self) -> Iterator[Tuple[str, str, Dict]]:
+        """
+        Lee las entradas no confirmadas desde el último offset.
+
+        Yields:
+            (segment_path, file, data) por cada línea completa.
+            Las líneas corruptas se saltean.
+        """
+        committed_seg, committed_off = self._committed
+        self._pending = None
+
+        for seg_id, sealed in list_segments(self.journal_dir):
+            if seg_id < committed_seg:
+                continue
+            start = committed_off if seg_id == committed_seg else 0
+            path = self._segment_path(seg_id, sealed)
+            try:
+                f = open(path, 'rb')
+            except FileNotFoundError:
+                # Se selló entre el listado y el open
+                path = self._segment_path(seg_id, True)
+                try:
+                    f = open(path, 'rb')
+                except FileNotFoundError:
+                    continue
+
+            with f:
+                f.seek(start)
+                offset = start
+                for raw in f:
+                    if not raw.endswith(b'\n'):
+                        break  # línea a medio escribir en el segmento activo
+                    offset += len(raw)
+                    self._pending = (seg_id, offset)
+                    try:
+                        entry = jsoncodec.loads(raw)
+                        yield path, entry['file'], entry['data']
+                    except (ValueError, KeyError, TypeError):
+                        continue
+
+    def commit(self):
+        """Persiste el offset de lo leído y borra segmentos sellados ya consumidos."""
+        if self._pending is None:
+            return
+        seg, off = self._pending
+        tmp = self.offset_file + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'segment': seg, 'offset': off}, f)
+        os.replace(tmp, self.offset_file)
+        self._committed = self._pending
+        self._pending = None
+
+        for seg_id, sealed in list_segments(self.journal_dir):
+            if not sealed or seg_id > seg:
+                break
+            path = self._segment_path(seg_id, True)
+            if seg_id == seg and off < os.path.getsize(path):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def rewind(self):
+        """Descarta lo leído sin confirmar (se vuelve a leer en el próximo ciclo)."""
+        self._pending = None
@@ -0,0 +1,308 @@
+"""
+Streaming de capturas listener → processor por un socket Unix local.
+
+Sin streaming cada paquete se serializa a disco, y el processor lo vuelve
+a leer y parsear. Con el processor en modo --daemon escuchando en
+`stream_socket`, el listener le manda cada paquete directo, en frames
+NDJSON con el mismo formato que el journal:
+
+    {"file": "wh2900_YYYYmmdd_HHMMSS_mmm.json", "data": {...json de rtl_433...}}\\n
+
+Los archivos/journal quedan como respaldo: si el processor no está
+escuchando o el socket está lleno (el processor está ocupado enviando a
+los targets), `publish` retorna False y el listener escribe la captura
+como siempre. Nunca se bloquea la lectura de rtl_433.
+
+Un frame escrito en el socket todavía no está a salvo: el processor lo
+tiene en memoria hasta el próximo ciclo. Cuando el ciclo lo entregó (o lo
+guardó en disco) responde por el mismo socket con
+
+    {"ack": N}\n        los primeros N frames de esta conexión están a salvo
+
+y hasta entonces el listener guarda una copia en memoria. Si la conexión
+se corta (processor caído, OOM, reinicio), si el ack no llega en
+`ack_timeout` segundos o si el listener termina, las copias sin ack se
+escriben en el respaldo (`fallback`). En el peor caso una captura llega
+dos veces, y el filename la descarta en la DB / outbox / dedup.
+
+Listener:
+    publisher = StreamPublisher('/run/wh2900/capture.sock', fallback=store)
+    if not publisher.publish(filename, data):
+        store(filename, data)     # write_capture(...) o journal.append(...)
+
+Processor:
+    server = StreamServer('/run/wh2900/capture.sock')
+    select(server.sockets(), ...); server.process(ready)
+    frames = server.take()        # [(filename, data), ...]
+    ...                           # entregados o guardados en disco
+    server.ack()                  # confirma lo del último take()
+"""
+import os
+import time
+import socket
+import logging
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
+
+import jsoncodec
+
+logger = logging.getLogger('wh2900')
+
+STREAM_SOCKET = '/run/wh2900/capture.sock'
+MAX_FRAME_BYTES = 64 * 1024  # un paquete de rtl_433 ocupa ~300 bytes
+DEFAULT_ACK_TIMEOUT = 120.0  # segundos; un ciclo del daemon tarda como mucho run_deadline
+
+
+def encode_frame(filename: str, data: Union[Dict, str]) -> bytes:
+    """Frame NDJSON; `data` puede ser el JSON ya serializado de rtl_433."""
+    return (jsoncodec.envelope(filename, data) + '\n').encode()
+
+
+class StreamPublisher:
+    """Lado listener: envío no bloqueante, con reconexión perezosa y copias hasta el ack."""
+
+    def __init__(self, path: str = STREAM_SOCKET,
+                 fallback: Optional[Callable[[str, Union[Dict, str]], None]] = None,
+                 ack_timeout: float = DEFAULT_ACK_TIMEOUT):
+        self.path = path
+        self.fallback = fallback
+        self.ack_timeout = ack_timeout
+        self.sock = None
+        # Resto de un frame enviado a medias: se completa antes del próximo
+        # para no romper el framing del lado del processor.
+        self._pending = b''
+        # Frames enviados en esta conexión (el processor cuenta igual) y los
+        # que todavía no tienen ack: (número, enviado a las, filename, data)
+        self._sent = 0
+        self._unacked: Deque[Tuple[int, float, str, Union[Dict, str]]] = deque()
+        self._acks = bytearray()
+
+    def _connect(self) -> bool:
+        if self.sock is not None:
+            return True
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            return False
+        self.sock = sock
+        self._pending = b''
+        self._sent = 0
+        self._acks.clear()
+        return True
+
+    def _disconnect(self):
+        if self.sock is not None:
+            self.sock.close()
+        self.sock = None
+        self._pending = b''
+        # Lo que el processor no confirmó puede haberse perdido con él
+        self._store_unacked(len(self._unacked))
+
+    def _store_unacked(self, count: int):
+        """Escribe en el respaldo los `count` frames sin ack más viejos."""
+        for _ in range(count):
+            _, _, filename, data = self._unacked.popleft()
+            if self.fallback is None:
+                continue
+            try:
+                self.fallback(filename, data)
+            except Exception as e:
+                logger.error(f"Stream: error guardando {filename} en el respaldo: {e}")
+
+    def _read_acks(self):
+        """Lee los acks pendientes del processor y suelta las copias confirmadas."""
+        while True:
+            try:
+                chunk = self.sock.recv(4096)
+            except BlockingIOError:
+                break
+            if not chunk:
+                raise ConnectionError("processor desconectado")
+            self._acks += chunk
+        end = self._acks.rfind(b'\n')
+        if end < 0:
+            return
+        acked = 0
+        for line in bytes(self._acks[:end]).split(b'\n'):
+            try:
+                acked = max(acked, int(jsoncodec.loads(line)['ack']))
+            except (ValueError, KeyError, TypeError):
+                continue
+        del self._acks[:end + 1]
+        while self._unacked and self._unacked[0][0] <= acked:
+            self._unacked.popleft()
+
+    def _expire_unacked(self):
+        """Frames sin ack después de ack_timeout: al respaldo (el processor no los confirmó)."""
+        limit = time.monotonic() - self.ack_timeout
+        expired = 0
+        for _, sent_at, _, _ in self._unacked:
+            if sent_at > limit:
+                break
+            expired += 1
+        if expired:
+            logger.warning(f"Stream: {expired} capturas sin ack en {self.ack_timeout:g}s, al respaldo")
+            self._store_unacked(expired)
+
+    def _send(self, data: bytes) -> int:
+        try:
+            return self.sock.send(data)
+        except BlockingIOError:
+            return 0
+
+    def publish(self, filename: str, data: Union[Dict, str]) -> bool:
+        """
+        Envía una captura al processor.
+
+        Returns:
+            True si el frame completo quedó en el socket (se guarda una
+            copia hasta el ack); False si hay que usar el respaldo (sin
+            processor escuchando o socket lleno).
+        """
+        if not self._connect():
+            return False
+        try:
+            self._read_acks()
+            self._expire_unacked()
+            if self._pending:
+                sent = self._send(self._pending)
+                self._pending = self._pending[sent:]
+                if self._pending:
+                    return False  # backpressure: el processor no está leyendo
+            frame = encode_frame(filename, data)
+            sent = self._send(frame)
+            if sent:
+                self._sent += 1  # el processor lo va a contar al completarse
+            if sent < len(frame):
+                # Se guarda también en el respaldo: el frame puede llegar
+                # duplicado, y el filename lo descarta en la DB / dedup.
+                self._pending = frame[sent:] if sent else b''
+                return False
+            self._unacked.append((self._sent, time.monotonic(), filename, data))
+            return True
+        except OSError:
+            self._disconnect()  # processor reiniciado: se reconecta en el próximo paquete
+            return False
+
+    def close(self):
+        """Cierra la conexión; lo que no tuvo ack va al respaldo."""
+        if self.sock is not None:
+            try:
+                self._read_acks()  # acks que llegaron desde el último paquete
+            except OSError:
+                pass
+        self._disconnect()
+
+
+class StreamServer:
+    """Lado processor: acepta listeners y junta los frames recibidos."""
+
+    def __init__(self, path: str = STREAM_SOCKET):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        try:
+            os.unlink(path)  # socket viejo de una ejecución anterior
+        except FileNotFoundError:
+            pass
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen(4)
+        self.server.setblocking(False)
+        self.clients: Dict[socket.socket, bytearray] = {}
+        self.frames: List[Tuple[str, Dict]] = []
+        # Frames recibidos por conexión (válidos o no, como los cuenta el
+        # listener) y hasta dónde llegó el último take(), para el ack
+        self._received: Dict[socket.socket, int] = {}
+        self._taken: Dict[socket.socket, int] = {}
+        self._acked: Dict[socket.socket, int] = {}
+
+    def sockets(self) -> List[socket.socket]:
+        """Sockets a vigilar con select()."""
+        return [self.server, *self.clients]
+
+    def process(self, ready):
+        """Atiende los sockets listos: conexiones nuevas y datos recibidos."""
+        for sock in ready:
+            if sock is self.server:
+                self._accept()
+            elif sock in self.clients:
+                self._receive(sock)
+
+    def _accept(self):
+        try:
+            client, _ = self.server.accept()
+        except BlockingIOError:
+            return
+        client.setblocking(False)
+        self.clients[client] = bytearray()
+        self._received[client] = 0
+        self._acked[client] = 0
+
+    def _receive(self, sock: socket.socket):
+        try:
+            chunk = sock.recv(256 * 1024)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b''
+        if not chunk:
+            # Listener desconectado: un frame incompleto se descarta (ya
+            # quedó en el respaldo del listener)
+            del self.clients[sock]
+            self._received.pop(sock, None)
+            self._taken.pop(sock, None)
+            self._acked.pop(sock, None)
+            sock.close()
+            return
+
+        buf = self.clients[sock]
+        buf += chunk
+        end = buf.rfind(b'\n')
+        if end < 0:
+            if len(buf) > MAX_FRAME_BYTES:
+                logger.warning("Stream: frame demasiado largo, descartado")
+                buf.clear()
+            return
+        lines = bytes(buf[:end])
+        del buf[:end + 1]
+        for line in lines.split(b'\n'):
+            self._received[sock] += 1
+            try:
+                entry = jsoncodec.loads(line)
+                self.frames.append((entry['file'], entry['data']))
+            except (ValueError, KeyError, TypeError):
+                logger.warning(f"Stream: frame inválido descartado ({line[:60]!r})")
+
+    def take(self) -> List[Tuple[str, Dict]]:
+        """Retorna y vacía los frames recibidos (confirmarlos con ack() cuando estén a salvo)."""
+        frames, self.frames = self.frames, []
+        self._taken = dict(self._received)
+        return frames
+
+    def ack(self):
+        """Avisa a cada listener que los frames del último take() ya están entregados o en disco."""
+        for sock, count in self._taken.items():
+            if sock not in self.clients or count <= self._acked[sock]:
+                continue
+            try:
+                sock.send(f'{{"ack":{count}}}\n'.encode())
+                self._acked[sock] = count
+            except OSError:
+                pass  # socket lleno o cerrado: el próximo ack es acumulativo
+        self._taken = {}
+
+    def close(self):
+        for sock in self.clients:
+            sock.close()
+        self.clients.clear()
+        self._received.clear()
+        self._taken.clear()
+        self._acked.clear()
+        self.server.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,189 @@
+"""
+Pool de conexiones PostgreSQL compartido por targets/ e integrations/.
+
+Los pools se crean de forma lazy (la primera vez que se pide una conexión)
+y se comparten por configuración de DB: el target postgres y el estado de
+las integraciones reutilizan las mismas conexiones en vez de abrir una
+nueva por operación. En modo daemon las conexiones sobreviven entre ciclos.
+
+Uso:
+    pool = get_pool({'host': ..., 'dbname': ...}, maxconn=2)
+    with pool.connection() as conn:
+        ...
+"""
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger('wh2900')
+
+# Una conexión que estuvo ociosa más de esto se verifica con "select 1"
+DEFAULT_HEALTH_CHECK_INTERVAL = 30.0
+# Con todas las conexiones prestadas, cuánto esperar a que se devuelva una
+DEFAULT_WAIT_TIMEOUT = 10.0
+
+_pools: Dict[tuple, 'ConnectionPool'] = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """Pool thread-safe con health check y reconexión con backoff exponencial."""
+
+    def __init__(self, db_config: Dict, maxconn: int = 2, retries: int = 2, backoff: float = 1.0,
+                 health_check_interval: float = DEFAULT_HEALTH_CHECK_INTERVAL,
+                 wait_timeout: float = DEFAULT_WAIT_TIMEOUT):
+        self.db_config = dict(db_config)
+        self.maxconn = maxconn
+        self.retries = retries
+        self.backoff = backoff
+        self.health_check_interval = health_check_interval
+        self.wait_timeout = wait_timeout
+        self._pool = None
+        self._lock = threading.Lock()
+        self._available = threading.Condition()
+        self._last_used: Dict[int, float] = {}
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    from psycopg2.pool import ThreadedConnectionPool
+                    # minconn=0 al crearlo: las conexiones se abren recién cuando se piden.
+                    # psycopg2 sólo guarda las devueltas mientras haya menos de minconn
+                    # ociosas (si no las cierra), así que después se sube a maxconn.
+                    pool = ThreadedConnectionPool(0, self.maxconn, **self.db_config)
+                    pool.minconn = self.maxconn
+                    self._pool = pool
+        return self._pool
+
+    def _take(self, pool):
+        """pool.getconn(), esperando hasta wait_timeout si están todas prestadas."""
+        from psycopg2.pool import PoolError
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            try:
+                return pool.getconn()
+            except PoolError:
+                if pool.closed or time.monotonic() >= deadline:
+                    raise
+                with self._available:
+                    # timeout corto: un putconn entre el error y el wait no se pierde
+                    self._available.wait(min(0.1, max(0.0, deadline - time.monotonic())))
+
+    def _is_healthy(self, conn) -> bool:
+        """Verifica que la conexión siga viva (sólo si estuvo ociosa un rato)."""
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is None:
+            return True  # recién abierta
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        import psycopg2
+        try:
+            with conn.cursor() as cur:
+                cur.execute("select 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        """
+        Obtiene una conexión sana del pool.
+
+        Reintenta con backoff exponencial si la DB no responde y, si están
+        todas prestadas, espera a que se devuelva una (hasta wait_timeout);
+        si se agotan los reintentos propaga la última excepción.
+        """
+        import psycopg2
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                pool = self._get_pool()
+                conn = self._take(pool)
+                if not self._is_healthy(conn):
+                    logger.info(f"Conexión a {self.db_config.get('host')} caída, reconectando")
+                    pool.putconn(conn, close=True)
+                    self._last_used.pop(id(conn), None)
+                    conn = self._take(pool)
+                return conn
+            except psycopg2.OperationalError as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"Error conectando a {self.db_config.get('host')} "
+                               f"(intento {attempt + 1}/{self.retries + 1}): {e}; reintento en {delay:g}s")
+                time.sleep(delay)
+                delay *= 2
+
+    def putconn(self, conn, close: bool = False):
+        """Devuelve la conexión al pool (o la descarta si close=True o está rota)."""
+        if self._pool is None:
+            conn.close()
+            return
+        if not close and not conn.closed:
+            try:
+                conn.rollback()  # no devolver conexiones con transacciones abiertas
+            except Exception:
+                close = True
+        close = close or bool(conn.closed)
+        if close:
+            self._last_used.pop(id(conn), None)
+        else:
+            self._last_used[id(conn)] = time.monotonic()
+        self._pool.putconn(conn, close=close)
+        with self._available:
+            self._available.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager: presta una conexión y la devuelve al salir."""
+        import psycopg2
+        conn = self.getconn()
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # Error de conexión: descartarla para que no vuelva al pool
+            self.putconn(conn, close=True)
+            raise
+        except BaseException:
+            self.putconn(conn)
+            raise
+        else:
+            self.putconn(conn)
+
+    def closeall(self):
+        """Cierra todas las conexiones del pool."""
+        with self._lock:
+            if self._pool is not None and not self._pool.closed:
+                self._pool.closeall()
+            self._pool = None
+            self._last_used.clear()
+
+
+def get_pool(db_config: Dict, maxconn: Optional[int] = None, **kwargs) -> ConnectionPool:
+    """
+    Retorna el pool compartido para `db_config`, creándolo si no existe.
+
+    Si el pool ya existe, `maxconn` sólo puede agrandarlo antes de que se
+    abra la primera conexión.
+    """
+    key = tuple(sorted(db_config.items()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_config, maxconn=maxconn or 2, **kwargs)
+            _pools[key] = pool
+        elif maxconn and maxconn > pool.maxconn and pool._pool is None:
+            pool.maxconn = maxconn
+        return pool
+
+
+def close_all():
+    """Cierra todos los pools (al terminar el proceso o recargar configuración)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
@@ -0,0 +1,136 @@
+"""
+Supresión de paquetes duplicados antes de enviar a los targets.
+
+rtl_433 suele emitir la misma transmisión varias veces seguidas (una por
+cada repetición que el sensor manda en la ráfaga). Sin filtrar, cada copia
+termina como una fila en la DB y un request HTTP por servicio.
+
+DedupCache recuerda las últimas capturas vistas (LRU acotado) y descarta
+las que repiten el mismo contenido dentro de una ventana de tiempo:
+    - formato RAW: mismo payload hex (rows[0].data)
+    - Fineoffset-WH65B: mismos campos decodificados
+
+De las copias de un mismo lote se conserva la de mejor RSSI. Las copias
+descartadas se devuelven aparte para que el processor igual borre sus
+archivos según la política.
+
+filter() no recuerda nada por sí solo: las claves del lote quedan
+pendientes hasta commit(), que el processor llama cuando el lote quedó
+entregado (o en el outbox). Si el envío falla los archivos se releen en el
+próximo ciclo y tienen que volver a pasar, no contarse como duplicados de
+sí mismos.
+
+Un registro RAW y uno Fineoffset de la misma ráfaga no se colapsan:
+llevan datos distintos (el Fineoffset trae el acumulador de lluvia).
+"""
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from targets.base import WeatherRecord
+
+DEFAULT_WINDOW = 2.0  # segundos; el sensor transmite cada ~16s
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def dedup_key(record: WeatherRecord) -> Optional[Hashable]:
+    """Clave de contenido del registro (None = no deduplicar)."""
+    if record.raw_data:
+        return ('raw', record.raw_data)
+    if record.packet_type is None and record.temp_c is not None:
+        return ('fineoffset', record.temp_c, record.humidity, record.wind_dir,
+                record.wind_speed_ms, record.gust_ms, record.rain_mm,
+                record.light_wm2, record.uvi)
+    return None
+
+
+class DedupCache:
+    """Cache LRU/TTL de capturas recientes, con contadores de hits/misses."""
+
+    def __init__(self, window: float = DEFAULT_WINDOW, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.window = window
+        self.max_entries = max_entries
+        # clave -> timestamp (epoch) de la última copia vista
+        self._seen: 'OrderedDict[Hashable, float]' = OrderedDict()
+        # claves del último filter(), hasta que se confirme el envío
+        self._pending: List[Tuple[Hashable, float]] = []
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def _expire(self, now: float):
+        """Descarta entradas fuera de la ventana y las que exceden max_entries."""
+        seen = self._seen
+        while seen:
+            ts = next(iter(seen.values()))
+            if ts >= now - self.window and len(seen) <= self.max_entries:
+                break
+            seen.popitem(last=False)
+
+    def filter(self, records: List[WeatherRecord]) -> Tuple[List[WeatherRecord], List[WeatherRecord]]:
+        """
+        Separa los registros únicos de los duplicados.
+
+        Returns:
+            (únicos, duplicados), ordenados por fecha de medición. Si un
+            lote trae varias copias se queda la de mejor RSSI. Las claves
+            del lote se recuerdan recién con commit().
+        """
+        unique: List[WeatherRecord] = []
+        duplicates: List[WeatherRecord] = []
+        # copias aceptadas en este lote: clave -> (posición en `unique`, timestamp)
+        batch: Dict[Hashable, Tuple[Optional[int], float]] = {}
+        pending: List[Tuple[Hashable, float]] = []
+        seen = self._seen
+
+        for record in sorted(records, key=lambda r: r.fecha_medicion):
+            key = dedup_key(record)
+            if key is None:
+                unique.append(record)
+                continue
+
+            ts = record.fecha_medicion.timestamp()
+            self._expire(ts)
+            accepted = batch.get(key)
+            last = accepted[1] if accepted is not None else seen.get(key)
+            pending.append((key, ts))
+
+            if last is None or ts - last > self.window:
+                self.misses += 1
+                batch[key] = (len(unique), ts)
+                unique.append(record)
+                continue
+
+            self.hits += 1
+            pos = accepted[0] if accepted is not None else None
+            batch[key] = (pos, ts)
+            if pos is not None and _better_rssi(record, unique[pos]):
+                duplicates.append(unique[pos])
+                unique[pos] = record
+            else:
+                duplicates.append(record)
+
+        self._pending = pending
+        return unique, duplicates
+
+    def commit(self):
+        """Recuerda las claves del último filter() (su lote quedó entregado)."""
+        seen = self._seen
+        for key, ts in self._pending:
+            seen[key] = ts
+            seen.move_to_end(key)
+        self._pending = []
+        if seen:
+            self._expire(next(reversed(seen.values())))
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        ratio = self.hits / total * 100 if total else 0.0
+        return f"hits={self.hits} misses={self.misses}, {ratio:.0f}% duplicados, {len(self)} en cache"
+
+
+def _better_rssi(candidate: WeatherRecord, current: WeatherRecord) -> bool:
+    if candidate.rssi is None:
+        return False
+    return current.rssi is None or candidate.rssi > current.rssi
@@ -0,0 +1,111 @@
+"""
+Sesiones HTTP compartidas con keep-alive, una por host.
+
+Todos los targets HTTP, las integraciones y el monitor piden sus requests
+a través de este módulo: la conexión TCP/TLS a cada servicio se reutiliza
+entre pushes (y entre ciclos en modo daemon) en vez de pagar DNS + TCP +
+TLS en cada `requests.get`.
+
+Uso:
+    http = HttpClient(connect_timeout=5, read_timeout=30, retries=2)
+    response = http.get(url)
+"""
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+DEFAULT_POOL_SIZE = 4
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+
+# Sólo se reintentan por status los GET: los POST podrían duplicar datos
+RETRY_STATUS = (502, 503, 504)
+
+_sessions: Dict[Tuple[str, str], requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(url: str, pool_size: int = DEFAULT_POOL_SIZE, retries: int = DEFAULT_RETRIES,
+                backoff: float = DEFAULT_BACKOFF) -> requests.Session:
+    """
+    Retorna la sesión compartida para el host de `url`, creándola si no existe.
+
+    `pool_size`, `retries` y `backoff` sólo aplican al crear la sesión: el
+    primero que habla con un host define su configuración.
+    """
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            retry = Retry(
+                total=retries,
+                connect=retries,  # errores de conexión: seguros de reintentar siempre
+                read=0,
+                status=retries,
+                backoff_factor=backoff,
+                status_forcelist=RETRY_STATUS,
+                allowed_methods=frozenset({'GET', 'HEAD'}),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+            session = requests.Session()
+            session.mount(f"{parts.scheme}://{parts.netloc}", adapter)
+            _sessions[key] = session
+    return session
+
+
+def close_all():
+    """Cierra todas las sesiones (y sus conexiones keep-alive)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+class HttpClient:
+    """Cliente liviano sobre las sesiones compartidas, con timeouts connect/read separados."""
+
+    def __init__(self, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT, retries: int = DEFAULT_RETRIES,
+                 pool_size: int = DEFAULT_POOL_SIZE, backoff: float = DEFAULT_BACKOFF):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.pool_size = pool_size
+        self.backoff = backoff
+
+    @classmethod
+    def from_config(cls, config: Dict[str, str]) -> 'HttpClient':
+        """Crea el cliente desde la sección de un target del INI."""
+        return cls(
+            connect_timeout=float(config.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT)),
+            read_timeout=float(config.get('read_timeout', config.get('timeout', DEFAULT_READ_TIMEOUT))),
+            retries=int(config.get('retries', DEFAULT_RETRIES)),
+            pool_size=int(config.get('pool_size', DEFAULT_POOL_SIZE)),
+        )
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        return (self.connect_timeout, self.read_timeout)
+
+    def request(self, method: str, url: str, timeout: Optional[Tuple[float, float]] = None,
+                **kwargs) -> requests.Response:
+        session = get_session(url, self.pool_size, self.retries, self.backoff)
+        return session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
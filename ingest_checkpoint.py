@@ -0,0 +1,107 @@
+"""
+Ingesta incremental del directorio de capturas.
+
+Los archivos se llaman wh2900_YYYYmmdd_HHMMSS_mmm.json, así que el orden
+alfabético es el orden de captura. En vez de re-leer todo lo que quedó en
+`capture_dir` en cada ciclo, se guarda el último nombre procesado y sólo se
+abren los archivos posteriores:
+
+    checkpoint = CaptureCheckpoint('/var/log/wh2900/ingest.checkpoint')
+    files, older = scan_captures(capture_dir, checkpoint.last)
+    ...
+    checkpoint.advance(files[-1])   # cuando el ciclo terminó bien
+
+El scan usa os.scandir y compara nombres: los archivos ya procesados se
+descartan sin stat ni lectura, así que el costo del ciclo depende de lo
+nuevo y no del tamaño del backlog. Sirve con delete_policy = never (los
+archivos quedan); con all/any lo entregado ya se borra y el checkpoint no
+ahorra nada. Con never el processor lo combina con el outbox: el
+checkpoint avanza cuando el lote está en el outbox y los reintentos son
+por target.
+
+Los nombres salen del reloj en UTC (capture_filename), así que un cambio
+de horario no los desordena. Si el reloj se atrasa (Pi sin RTC antes de
+sincronizar NTP, ajuste manual) las capturas nuevas quedan con nombres
+anteriores al checkpoint: check_clock() lo detecta y retrocede el
+checkpoint, y `older` devuelve esos archivos para que el processor decida.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from capture_journal import capture_filename
+
+CAPTURE_PREFIX = 'wh2900_'
+CAPTURE_SUFFIX = '.json'
+# Al detectar el reloj atrasado el checkpoint vuelve hasta esta cantidad de
+# segundos antes de la hora actual (cubre lo capturado desde el salto)
+CLOCK_STEP_MARGIN = 3600
+
+
+def scan_captures(capture_dir: str, after: str = '') -> Tuple[List[str], List[str]]:
+    """
+    Rutas de las capturas de `capture_dir`, ordenadas por nombre (= fecha
+    de captura).
+
+    Returns:
+        (nombre mayor a `after`, nombre menor o igual a `after`)
+    """
+    names = []
+    older = []
+    try:
+        with os.scandir(capture_dir) as it:
+            for entry in it:
+                name = entry.name
+                if name.startswith(CAPTURE_PREFIX) and name.endswith(CAPTURE_SUFFIX):
+                    (names if name > after else older).append(name)
+    except FileNotFoundError:
+        return [], []
+    names.sort()
+    older.sort()
+    return ([os.path.join(capture_dir, name) for name in names],
+            [os.path.join(capture_dir, name) for name in older])
+
+
+class CaptureCheckpoint:
+    """Último archivo de captura ingresado, persistido de forma atómica."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.last = ''
+        try:
+            with open(path) as f:
+                self.last = f.read().strip()
+        except FileNotFoundError:
+            pass
+
+    def advance(self, filepath: str):
+        """Mueve el checkpoint hasta `filepath` (nunca hacia atrás)."""
+        name = os.path.basename(filepath)
+        if name <= self.last:
+            return
+        self._write(name)
+
+    def check_clock(self, now: Optional[datetime] = None) -> bool:
+        """
+        Retrocede el checkpoint si quedó adelante del reloj.
+
+        Con el reloj atrasado las capturas nuevas se llaman como capturas
+        viejas y el scan nunca las vería. Se vuelve a CLOCK_STEP_MARGIN
+        antes de la hora actual (puede reenviar capturas que quedaron en
+        el directorio, pero no perder las nuevas).
+
+        Returns:
+            True si hubo que retrocederlo.
+        """
+        now = now or datetime.now(timezone.utc)
+        if self.last <= capture_filename(now):
+            return False
+        self._write(capture_filename(now - timedelta(seconds=CLOCK_STEP_MARGIN)))
+        return True
+
+    def _write(self, name: str):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(name + '\n')
+        os.replace(tmp, self.path)
+        self.last = name
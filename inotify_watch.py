@@ -0,0 +1,91 @@
+"""
+Watcher de inotify (Linux, vía ctypes) para el modo daemon del processor.
+
+En vez de esperar al próximo ciclo de `daemon_interval`, el daemon se
+despierta apenas el listener termina de escribir una captura:
+    IN_CLOSE_WRITE  archivo escrito y cerrado
+    IN_MOVED_TO     archivo renombrado al directorio (escritura atómica)
+    IN_MODIFY       líneas agregadas a un segmento del journal
+
+Sin dependencias externas: usa inotify_init1/inotify_add_watch de libc.
+En sistemas sin inotify `AVAILABLE` es False y el daemon sigue con polling.
+
+    watcher = InotifyWatcher()
+    watcher.add_watch('/var/log/wh2900', IN_CLOSE_WRITE | IN_MOVED_TO)
+    if watcher.wait(1.0):
+        ...  # hay capturas nuevas
+"""
+import os
+import select
+import struct
+import ctypes
+import ctypes.util
+from typing import Dict, List, Tuple
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+CAPTURE_EVENTS = IN_CLOSE_WRITE | IN_MOVED_TO
+
+_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len (+ name)
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    _libc.inotify_init1.argtypes = [ctypes.c_int]
+    _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    AVAILABLE = True
+except (OSError, AttributeError):
+    _libc = None
+    AVAILABLE = False
+
+
+class InotifyWatcher:
+    """Eventos de inotify sobre uno o más directorios, con espera con timeout."""
+
+    def __init__(self):
+        if not AVAILABLE:
+            raise OSError("inotify no disponible en este sistema")
+        self.fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._paths: Dict[int, str] = {}
+
+    def add_watch(self, path: str, mask: int = CAPTURE_EVENTS) -> int:
+        wd = _libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        self._paths[wd] = path
+        return wd
+
+    def read_events(self) -> List[Tuple[str, str, int]]:
+        """Lee los eventos pendientes sin bloquear: [(directorio, nombre, máscara)]."""
+        events = []
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _, length = _EVENT.unpack_from(buf, offset)
+                offset += _EVENT.size
+                name = buf[offset:offset + length].rstrip(b'\0').decode(errors='replace')
+                offset += length
+                events.append((self._paths.get(wd, ''), name, mask))
+
+    def wait(self, timeout: float) -> List[Tuple[str, str, int]]:
+        """Espera hasta `timeout` segundos por eventos y los retorna (vacío si no hubo)."""
+        ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        return self.read_events() if ready else []
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
@@ -9,6 +9,9 @@ from datetime import datetime, timezone
 from typing import Optional
 import logging
 
+from http_pool import HttpClient
+from .state import get_state_store
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -31,6 +34,8 @@ class WeatherData:
     wind_dir: Optional[float] = None
     gust_ms: Optional[float] = None
     rain_mm: Optional[float] = None
+    rain_1h_mm: Optional[float] = None  # Rolling last hour
+    rain_day_mm: Optional[float] = None  # Since local midnight
     light_wm2: Optional[float] = None
     uvi: Optional[int] = None
     pressure_hpa: Optional[float] = None  # Not available from WH2900 RF
@@ -41,50 +46,23 @@ class WeatherServiceBase(ABC):
 
     name: str = "base"
     min_interval_seconds: int = 600  # Default 10 minutes
+    error_text_limit: Optional[int] = None  # Truncate response body in error messages
 
     def __init__(self, enabled: bool = True):
         self.enabled = enabled
+        self.http = HttpClient()
 
-    def _get_db_connection(self):
-        """Get a database connection for state persistence."""
-        import psycopg2
-        return psycopg2.connect(**DB_CONFIG)
+    def _get_state_store(self):
+        """Get the shared write-behind cache of integration_state."""
+        return get_state_store(DB_CONFIG)
 
     def _load_last_push_time(self) -> Optional[datetime]:
-        """Load last push time from database."""
-        try:
-            conn = self._get_db_connection()
-            with conn.cursor() as cur:
-                cur.execute("""
-                    select last_push_time from integration_state
-                    where service_name = %s
-                """, (self.name,))
-                row = cur.fetchone()
-                conn.close()
-                return row[0] if row else None
-        except Exception as e:
-            logger.debug(f"[{self.name}] Error loading last push time: {e}")
-            return None
+        """Load last push time (from the in-process state cache)."""
+        return self._get_state_store().last_push_time(self.name)
 
     def _save_push_state(self, status: str = 'ok', error: str = None):
-        """Save push state to database."""
-        try:
-            conn = self._get_db_connection()
-            with conn.cursor() as cur:
-                cur.execute("""
-                    insert into integration_state (service_name, last_push_time, last_status, last_error, push_count)
-                    values (%s, now(), %s, %s, 1)
-                    on conflict (service_name) do update set
-                        last_push_time = now(),
-                        last_status = excluded.last_status,
-                        last_error = excluded.last_error,
-                        push_count = integration_state.push_count + 1,
-                        updated_at = now()
-                """, (self.name, status, error))
-                conn.commit()
-                conn.close()
-        except Exception as e:
-            logger.error(f"[{self.name}] Error saving push state: {e}")
+        """Save push state (persisted to the database in the background)."""
+        self._get_state_store().record(self.name, status, error)
 
     @abstractmethod
     def build_url(self, data: WeatherData) -> str:
@@ -96,6 +74,24 @@ class WeatherServiceBase(ABC):
         """Push weather data to the service. Returns True on success."""
         pass
 
+    def check_response(self, status: int, text: str) -> bool:
+        """Check if the HTTP response means the service accepted the push."""
+        return status == 200
+
+    def handle_response(self, data: WeatherData, status: int, text: str) -> bool:
+        """Save state and log the outcome of a push. Returns True on success."""
+        if self.check_response(status, text):
+            self._save_push_state(status='ok')
+            self.log_success(data)
+            return True
+        self.handle_error(f"HTTP {status}: {text[:self.error_text_limit]}")
+        return False
+
+    def handle_error(self, error: str):
+        """Save state and log a failed push (HTTP or network error)."""
+        self._save_push_state(status='error', error=error)
+        self.log_error(error)
+
     def can_push(self) -> bool:
         """Check if enough time has passed since last push."""
         if not self.enabled:
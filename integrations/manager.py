@@ -49,6 +49,16 @@ class IntegrationManager:
                 results[service.name] = service.push(data)
         return results
 
+    def push_all_async(self, data: WeatherData) -> Dict[str, bool]:
+        """
+        Push data to all enabled services concurrently (asyncio engine).
+        Falls back to sequential push_all() if aiohttp is not installed.
+        """
+        import async_delivery
+        if not async_delivery.AVAILABLE:
+            return self.push_all(data)
+        return async_delivery.get_engine().push_services(self.services, data)
+
     def push_from_db_record(self, record: Dict[str, Any]) -> Dict[str, bool]:
         """
         Push data from a database record (medicion table format).
@@ -61,6 +71,8 @@ class IntegrationManager:
             wind_dir=record.get('wind_dir'),
             gust_ms=record.get('gust_ms'),
             rain_mm=record.get('rain_mm'),
+            rain_1h_mm=record.get('rain_1h_mm'),
+            rain_day_mm=record.get('rain_day_mm'),
             light_wm2=record.get('light_wm2'),
             uvi=record.get('uvi'),
         )
@@ -0,0 +1,154 @@
+"""
+Write-behind cache for the integration_state table.
+
+The table is read once (on first use) and the in-process copy is
+authoritative from then on: can_push() never touches the DB. Push results
+are queued and a background thread upserts them in batches with a single
+statement; whatever is still pending is flushed at interpreter exit.
+
+Usage:
+    store = get_state_store(DB_CONFIG)
+    store.last_push_time('weathercloud')
+    store.record('weathercloud', 'ok')
+"""
+import atexit
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from db_pool import get_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 5.0  # seconds between background flushes
+
+UPSERT_STATE = """
+    insert into integration_state (service_name, last_push_time, last_status, last_error, push_count)
+    values %s
+    on conflict (service_name) do update set
+        last_push_time = excluded.last_push_time,
+        last_status = excluded.last_status,
+        last_error = excluded.last_error,
+        push_count = integration_state.push_count + excluded.push_count,
+        updated_at = now()
+"""
+
+_stores: Dict[tuple, 'IntegrationStateStore'] = {}
+_stores_lock = threading.Lock()
+
+
+@dataclass
+class PendingState:
+    """Latest unsaved push result for a service, plus how many pushes it covers."""
+    last_push_time: datetime
+    last_status: str
+    last_error: Optional[str]
+    push_count: int = 1
+
+
+class IntegrationStateStore:
+    """In-process integration_state with batched, asynchronous persistence."""
+
+    def __init__(self, db_config: Dict, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.db_config = db_config
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._push_times: Optional[Dict[str, datetime]] = None
+        self._pending: Dict[str, PendingState] = {}
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        atexit.register(self.close)
+
+    def _load(self) -> Dict[str, datetime]:
+        """Read every service's last push time (once per process)."""
+        if self._push_times is not None:
+            return self._push_times
+        push_times = {}
+        try:
+            with get_pool(self.db_config).connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("select service_name, last_push_time from integration_state")
+                    for name, last_push in cur.fetchall():
+                        if last_push.tzinfo is None:
+                            last_push = last_push.replace(tzinfo=timezone.utc)
+                        push_times[name] = last_push
+        except Exception as e:
+            logger.debug(f"Error loading integration state: {e}")
+        self._push_times = push_times
+        return push_times
+
+    def last_push_time(self, name: str) -> Optional[datetime]:
+        with self._lock:
+            return self._load().get(name)
+
+    def record(self, name: str, status: str = 'ok', error: Optional[str] = None):
+        """Record a push attempt; it is written to the DB in the background."""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            self._load()[name] = now
+            pending = self._pending.get(name)
+            count = pending.push_count + 1 if pending else 1
+            self._pending[name] = PendingState(now, status, error, count)
+            self._ensure_thread()
+        self._wakeup.set()
+
+    def _ensure_thread(self):
+        if self._thread is None and not self._stopped.is_set():
+            self._thread = threading.Thread(target=self._run, name='integration-state', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait()
+            # Let pushes from the same cycle pile up into one statement;
+            # on shutdown close() does the final flush
+            if self._stopped.wait(self.flush_interval):
+                break
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Upsert all pending results in one statement (re-queued on failure)."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        from psycopg2.extras import execute_values
+        rows = [(name, s.last_push_time, s.last_status, s.last_error, s.push_count)
+                for name, s in pending.items()]
+        try:
+            with get_pool(self.db_config).connection() as conn:
+                with conn.cursor() as cur:
+                    execute_values(cur, UPSERT_STATE, rows)
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error saving integration state ({len(rows)} services): {e}")
+            with self._lock:
+                for name, state in pending.items():
+                    newer = self._pending.get(name)
+                    if newer is not None:
+                        newer.push_count += state.push_count
+                    else:
+                        self._pending[name] = state
+
+    def close(self):
+        """Stop the background thread and flush what is left."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+
+def get_state_store(db_config: Dict, **kwargs) -> IntegrationStateStore:
+    """Return the shared state store for `db_config` (creating it if needed)."""
+    key = tuple(sorted(db_config.items()))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = IntegrationStateStore(db_config, **kwargs)
+        return store
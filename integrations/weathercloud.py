@@ -64,8 +64,9 @@ class WeathercloudService(WeatherServiceBase):
         if data.gust_ms is not None:
             parts.append(f"wspdhi/{int(data.gust_ms * 10)}")
 
-        if data.rain_mm is not None:
-            parts.append(f"rain/{int(data.rain_mm * 10)}")
+        rain_day = data.rain_day_mm if data.rain_day_mm is not None else data.rain_mm
+        if rain_day is not None:
+            parts.append(f"rain/{int(rain_day * 10)}")
 
         if data.light_wm2 is not None:
             parts.append(f"solarrad/{int(data.light_wm2 * 10)}")
@@ -87,22 +88,13 @@ class WeathercloudService(WeatherServiceBase):
         url = self.build_url(data)
 
         try:
-            response = requests.get(url, timeout=30)
-
-            if response.status_code == 200:
-                self._save_push_state(status='ok')
-                self.log_success(data)
-                return True
-            else:
-                self._save_push_state(status='error', error=f"HTTP {response.status_code}: {response.text}")
-                self.log_error(f"HTTP {response.status_code}: {response.text}")
-                return False
-
+            response = self.http.get(url)
         except requests.RequestException as e:
-            self._save_push_state(status='error', error=str(e))
-            self.log_error(str(e))
+            self.handle_error(str(e))
             return False
 
+        return self.handle_response(data, response.status_code, response.text)
+
 
 # Convenience function for quick testing
 def push_to_weathercloud(data: WeatherData) -> bool:
@@ -19,6 +19,7 @@ class WundergroundService(WeatherServiceBase):
     name = "wunderground"
     base_url = "https://rtupdate.wunderground.com/weatherstation/updateweatherstation.php"
     min_interval_seconds = 60  # 1 minute recommended
+    error_text_limit = 100
 
     def __init__(self, station_id: Optional[str] = None, station_key: Optional[str] = None, enabled: bool = True):
         super().__init__(enabled)
@@ -29,6 +30,10 @@ class WundergroundService(WeatherServiceBase):
             logger.warning(f"[{self.name}] Missing credentials, disabling")
             self.enabled = False
 
+    def check_response(self, status: int, text: str) -> bool:
+        """WU returns "success" on successful upload."""
+        return status == 200 and 'success' in text.lower()
+
     @staticmethod
     def celsius_to_fahrenheit(c: float) -> float:
         """Convert Celsius to Fahrenheit."""
@@ -91,10 +96,13 @@ class WundergroundService(WeatherServiceBase):
         if data.gust_ms is not None:
             params['windgustmph'] = f"{self.ms_to_mph(data.gust_ms):.1f}"
 
-        # Rain (convert mm to inches)
-        if data.rain_mm is not None:
-            params['rainin'] = f"{self.mm_to_inches(data.rain_mm):.3f}"
-            params['dailyrainin'] = f"{self.mm_to_inches(data.rain_mm):.3f}"  # TODO: accumulate daily
+        # Rain (convert mm to inches); totals fall back to the latest delta
+        rain_1h = data.rain_1h_mm if data.rain_1h_mm is not None else data.rain_mm
+        rain_day = data.rain_day_mm if data.rain_day_mm is not None else data.rain_mm
+        if rain_1h is not None:
+            params['rainin'] = f"{self.mm_to_inches(rain_1h):.3f}"
+        if rain_day is not None:
+            params['dailyrainin'] = f"{self.mm_to_inches(rain_day):.3f}"
 
         # Solar radiation (same unit - W/m2)
         if data.light_wm2 is not None:
@@ -118,24 +126,13 @@ class WundergroundService(WeatherServiceBase):
         url = self.build_url(data)
 
         try:
-            response = requests.get(url, timeout=30)
-
-            # WU returns "success" on successful upload
-            if response.status_code == 200 and 'success' in response.text.lower():
-                self._save_push_state(status='ok')
-                self.log_success(data)
-                return True
-            else:
-                error_msg = f"HTTP {response.status_code}: {response.text[:100]}"
-                self._save_push_state(status='error', error=error_msg)
-                self.log_error(error_msg)
-                return False
-
+            response = self.http.get(url)
         except requests.RequestException as e:
-            self._save_push_state(status='error', error=str(e))
-            self.log_error(str(e))
+            self.handle_error(str(e))
             return False
 
+        return self.handle_response(data, response.status_code, response.text)
+
 
 # Convenience function for quick testing
 def push_to_wunderground(data: WeatherData) -> bool:
@@ -0,0 +1,63 @@
+"""
+Codec JSON del camino caliente (un parse/serialize por paquete).
+
+Usa la librería más rápida instalada y cae a la stdlib si no hay ninguna:
+    orjson    loads + dumps
+    simdjson  loads (pysimdjson); dumps de la stdlib
+    json      stdlib
+
+La salida de dumps es siempre compacta (sin espacios) y `dumps` retorna
+str en todos los backends. `DecodeError` agrupa los errores de parseo
+(todos heredan de ValueError).
+
+Para no re-serializar lo que ya viene como JSON (la línea de rtl_433),
+`envelope` arma la línea del journal/stream insertando el texto tal cual:
+
+    line = jsoncodec.envelope(filename, raw_line)
+    # '{"file":"wh2900_....json","data":<raw_line>}'
+"""
+import json
+from typing import Any, Union
+
+DecodeError = ValueError
+
+try:
+    import orjson
+
+    BACKEND = 'orjson'
+    loads = orjson.loads
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+
+    def dumpb(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+except ImportError:
+    try:
+        import simdjson
+
+        BACKEND = 'simdjson'
+        loads = simdjson.loads
+    except ImportError:
+        BACKEND = 'json'
+        loads = json.loads
+
+    _encoder = json.JSONEncoder(separators=(',', ':'))
+
+    def dumps(obj: Any) -> str:
+        return _encoder.encode(obj)
+
+    def dumpb(obj: Any) -> bytes:
+        return _encoder.encode(obj).encode()
+
+
+def envelope(filename: str, data: Union[str, Any]) -> str:
+    """
+    Línea {"file": ..., "data": ...} del journal y del stream (sin '\\n').
+
+    `data` puede ser el JSON ya serializado (str): se inserta sin parsear.
+    """
+    if not isinstance(data, str):
+        data = dumps(data)
+    return f'{{"file":{dumps(filename)},"data":{data}}}'
@@ -0,0 +1,118 @@
+"""
+Outbox local durable (SQLite en modo WAL) con un cursor de entrega por target.
+
+Sin outbox, con delete_policy = all un target caído deja todos los
+archivos en disco y cada ciclo re-lee, re-decodifica y re-envía el backlog
+completo a todos los targets, incluso a los que ya lo aceptaron.
+
+Con outbox los registros decodificados se guardan una sola vez y los
+archivos de captura se pueden borrar apenas se ingresan. Cada target lee
+sólo lo que todavía no confirmó:
+
+    outbox = Outbox('/var/log/wh2900/outbox.db')
+    outbox.append(records)                 # al ingresar capturas
+    pending = outbox.pending('db')         # [(id, WeatherRecord), ...]
+    outbox.ack('db', pending[-1][0])       # si el target respondió OK
+    outbox.prune(['db', 'weathercloud'])   # borra lo que ya confirmaron todos
+
+Las filas se borran cuando todos los targets activos avanzaron su cursor
+más allá de ellas.
+"""
+import os
+import sqlite3
+from datetime import datetime
+from typing import Iterable, List, Tuple
+
+import jsoncodec
+from targets.base import WeatherRecord
+
+DEFAULT_OUTBOX_FILE = '/var/log/wh2900/outbox.db'
+DEFAULT_DRAIN_LIMIT = 5000  # registros por target por ciclo
+
+SCHEMA = """
+    create table if not exists records (
+        id integer primary key autoincrement,
+        filename text not null unique,
+        record text not null
+    );
+    create table if not exists cursors (
+        target text primary key,
+        last_id integer not null
+    );
+"""
+
+
+def _encode(record: WeatherRecord) -> str:
+    d = record.to_dict()
+    d['fecha_medicion'] = record.fecha_medicion.isoformat()
+    return jsoncodec.dumps(d)
+
+
+def _decode(text: str) -> WeatherRecord:
+    d = jsoncodec.loads(text)
+    d['fecha_medicion'] = datetime.fromisoformat(d['fecha_medicion'])
+    return WeatherRecord.from_dict(d)
+
+
+class Outbox:
+    """Cola persistente de registros con un cursor de entrega por target."""
+
+    def __init__(self, path: str = DEFAULT_OUTBOX_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('pragma journal_mode=wal')
+        self.conn.execute('pragma synchronous=normal')
+        self.conn.executescript(SCHEMA)
+
+    def append(self, records: Iterable[WeatherRecord]) -> int:
+        """
+        Guarda registros (en una transacción). Los filenames ya presentes se
+        ignoran, así que re-ingresar un archivo tras un corte no lo duplica.
+
+        Returns:
+            Cantidad de registros nuevos.
+        """
+        with self.conn:
+            cur = self.conn.executemany(
+                'insert or ignore into records (filename, record) values (?, ?)',
+                ((r.filename, _encode(r)) for r in records),
+            )
+        return cur.rowcount
+
+    def cursor(self, target: str) -> int:
+        row = self.conn.execute('select last_id from cursors where target = ?', (target,)).fetchone()
+        return row[0] if row else 0
+
+    def pending(self, target: str, limit: int = DEFAULT_DRAIN_LIMIT) -> List[Tuple[int, WeatherRecord]]:
+        """Registros todavía no confirmados por `target`, del más viejo al más nuevo."""
+        rows = self.conn.execute(
+            'select id, record from records where id > ? order by id limit ?',
+            (self.cursor(target), limit),
+        )
+        return [(row_id, _decode(text)) for row_id, text in rows]
+
+    def ack(self, target: str, last_id: int):
+        """Avanza el cursor de `target` hasta `last_id` inclusive."""
+        with self.conn:
+            self.conn.execute(
+                'insert into cursors (target, last_id) values (?, ?) '
+                'on conflict (target) do update set last_id = max(last_id, excluded.last_id)',
+                (target, last_id),
+            )
+
+    def backlog(self, target: str) -> int:
+        """Cantidad de registros pendientes para `target`."""
+        return self.conn.execute('select count(*) from records where id > ?', (self.cursor(target),)).fetchone()[0]
+
+    def prune(self, targets: List[str]) -> int:
+        """Borra los registros que ya confirmaron todos los `targets`."""
+        if not targets:
+            return 0
+        low = min(self.cursor(t) for t in targets)
+        with self.conn:
+            cur = self.conn.execute('delete from records where id <= ?', (low,))
+        return cur.rowcount
+
+    def close(self):
+        self.conn.close()
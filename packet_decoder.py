@@ -0,0 +1,137 @@
+"""
+Decodificador de paquetes WH2900, compartido por processor, whctl y decode_wh2900.py.
+
+El formato de cada tipo de paquete (byte 3) se describe en PACKET_LAYOUTS:
+qué tabla usar para temperatura y humedad. Las conversiones byte → valor
+están precalculadas en tablas de 256 entradas, así que decodificar es un
+único lookup de layout más indexado de tuplas.
+
+    decode_bytes(b)  -> tupla en el orden de FIELDS (sin crear dict)
+    decode_hex(hex)  -> idem desde el hex de rtl_433
+    decode_packet(hex) -> dict (compatibilidad con el formato anterior)
+
+Estructura (ver README, "Packet Structure"):
+    b[2] & 0x0F       dirección del viento * 22.5
+    b[3]              tipo de paquete
+    b[4]              temperatura (según tipo)
+    b[5]              humedad (según tipo)
+    b[6], b[7]        viento / ráfaga en décimas de m/s
+    b[9] & 0x0F       lluvia * 0.1 mm
+    b[10..11]         luz / 29 W/m²
+    b[12] >> 4        UVI
+"""
+import logging
+from typing import Dict, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger('wh2900')
+
+MIN_PACKET_BYTES = 13
+
+# Orden de los campos en la tupla de decode_bytes/decode_hex
+FIELDS = (
+    'packet_type', 'wind_dir', 'light_wm2', 'uvi',
+    'temp_c', 'humidity', 'wind_speed_ms', 'gust_ms', 'rain_mm',
+)
+
+
+def _humidity(h: int) -> Optional[int]:
+    return h if 0 <= h <= 100 else None
+
+
+# --- Tablas precalculadas (índice = valor del byte) ------------------------
+
+# Tipos 0x13/0x14: temp = (b4 - 10) / 10
+TEMP_MINUS_10 = tuple((b - 10) / 10 for b in range(256))
+# Tipos 0x15/0x16/0x17: temp = (b4 + 100) / 10
+TEMP_PLUS_100 = tuple((b + 100) / 10 for b in range(256))
+
+# Tipo 0x13: dos formatos (b5 >= 128: b5 - 117, si no b5 + 32)
+HUMIDITY_DUAL = tuple(_humidity(b - 117 if b >= 128 else b + 32) for b in range(256))
+# Tipos 0x15/0x16/0x17: hum = b5 - 10
+HUMIDITY_MINUS_10 = tuple(_humidity(b - 10) for b in range(256))
+
+TENTHS = tuple(b / 10 for b in range(256))
+RAIN_MM = tuple((b & 0x0F) * 0.1 for b in range(256))
+WIND_DIR = tuple((b & 0x0F) * 22.5 for b in range(256))
+UVI = tuple((b >> 4) & 0x0F for b in range(256))
+
+
+class PacketLayout(NamedTuple):
+    """Cómo decodificar temperatura y humedad de un tipo de paquete."""
+    temp: Tuple[float, ...]
+    humidity: Optional[Tuple[Optional[int], ...]]  # None = humedad sin decodificar
+
+
+PACKET_LAYOUTS: Dict[int, PacketLayout] = {
+    0x13: PacketLayout(TEMP_MINUS_10, HUMIDITY_DUAL),
+    0x14: PacketLayout(TEMP_MINUS_10, None),  # humedad: fórmula aún no encontrada
+    0x15: PacketLayout(TEMP_PLUS_100, HUMIDITY_MINUS_10),
+    0x16: PacketLayout(TEMP_PLUS_100, HUMIDITY_MINUS_10),  # mismo formato que 0x15
+    0x17: PacketLayout(TEMP_PLUS_100, HUMIDITY_MINUS_10),  # mismo formato que 0x15/0x16
+}
+
+KNOWN_PACKET_TYPES = frozenset(PACKET_LAYOUTS)
+
+EMPTY = (None,) * len(FIELDS)
+
+
+def decode_bytes(b: bytes, data_hex: str = '') -> Optional[tuple]:
+    """
+    Decodifica un paquete ya convertido a bytes.
+
+    Returns:
+        Tupla en el orden de FIELDS, o None si el paquete es muy corto.
+        Para tipos desconocidos sólo se completan los campos comunes.
+    """
+    if len(b) < MIN_PACKET_BYTES:
+        return None
+
+    packet_type = b[3]
+    common = (packet_type, WIND_DIR[b[2]], ((b[10] << 8) | b[11]) / 29, UVI[b[12]])
+
+    layout = PACKET_LAYOUTS.get(packet_type)
+    if layout is None:
+        # Alertar sobre tipos de paquete desconocidos
+        logger.warning(f"TIPO DESCONOCIDO 0x{packet_type:02X} ({packet_type}) - raw: {data_hex or b.hex()}")
+        return common + (None, None, None, None, None)
+
+    humidity = layout.humidity[b[5]] if layout.humidity is not None else None
+    return common + (layout.temp[b[4]], humidity, TENTHS[b[6]], TENTHS[b[7]], RAIN_MM[b[9]])
+
+
+def decode_hex(data_hex: str) -> Optional[tuple]:
+    """Decodifica el hex de rtl_433 (rows[0].data). Ver decode_bytes."""
+    if len(data_hex) < 16:
+        return None
+
+    try:
+        b = bytes.fromhex(data_hex)
+    except ValueError:
+        return None
+
+    return decode_bytes(b, data_hex)
+
+
+def decode_packet(data_hex: str) -> Optional[Dict]:
+    """
+    Decodifica un paquete WH2900 a dict.
+
+    Los campos que el tipo de paquete no define no aparecen en el dict
+    (ej. humidity en 0x14, temp_c en tipos desconocidos).
+    """
+    decoded = decode_hex(data_hex)
+    if decoded is None:
+        return None
+
+    packet_type, wind_dir, light_wm2, uvi, temp_c, humidity, wind_speed_ms, gust_ms, rain_mm = decoded
+    result = {'packet_type': packet_type, 'wind_dir': wind_dir, 'light_wm2': light_wm2, 'uvi': uvi}
+
+    layout = PACKET_LAYOUTS.get(packet_type)
+    if layout is not None:
+        result['temp_c'] = temp_c
+        if layout.humidity is not None:
+            result['humidity'] = humidity
+        result['wind_speed_ms'] = wind_speed_ms
+        result['gust_ms'] = gust_ms
+        result['rain_mm'] = rain_mm
+    return result
@@ -4,12 +4,20 @@ Módulo para calcular lluvia incremental a partir del acumulador total.
 El sensor WH2900/Fineoffset-WH65B reporta rain_mm como acumulador total
 desde que se instaló. Este módulo guarda el último valor y calcula
 la diferencia para obtener lluvia reciente.
+
+Además lleva los totales que piden los servicios (RainAccumulator):
+lluvia de la última hora, de las últimas 24 horas y desde la medianoche
+local. Los deltas se guardan en un ring buffer de 1440 minutos, así que
+cada actualización es O(1) y no hace falta consultar la DB.
 """
 import os
 import json
 from datetime import datetime, timezone
-from typing import Optional, Tuple
-from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from dataclasses import dataclass, field
+
+MINUTES_1H = 60
+MINUTES_24H = 24 * 60
 
 
 @dataclass
@@ -17,27 +25,138 @@ class RainState:
     """Estado persistente de lluvia."""
     last_rain_mm: float
     last_update: str  # ISO format
+    last_reading: str = ''  # fecha_medicion (ISO) de la última lectura usada
+    accumulator: Dict = field(default_factory=dict)  # RainAccumulator.to_dict()
 
     def to_dict(self) -> dict:
         return {
             'last_rain_mm': self.last_rain_mm,
-            'last_update': self.last_update
+            'last_update': self.last_update,
+            'last_reading': self.last_reading,
+            'accumulator': self.accumulator,
         }
 
     @classmethod
     def from_dict(cls, d: dict) -> 'RainState':
         return cls(
             last_rain_mm=d.get('last_rain_mm', 0.0),
-            last_update=d.get('last_update', '')
+            last_update=d.get('last_update', ''),
+            last_reading=d.get('last_reading', ''),
+            accumulator=d.get('accumulator', {}),
         )
 
 
+def _local_day(minute: int) -> str:
+    """Fecha local (YYYY-MM-DD) de un minuto epoch."""
+    return datetime.fromtimestamp(minute * 60).astimezone().date().isoformat()
+
+
+class RainAccumulator:
+    """
+    Totales de lluvia rodantes (1h, 24h) y del día local.
+
+    Un bucket por minuto de las últimas 24 horas; los totales se mantienen
+    sumando al agregar y restando los buckets que salen de cada ventana.
+    """
+
+    def __init__(self):
+        self.buckets = [0.0] * MINUTES_24H
+        self.minute: Optional[int] = None  # último minuto epoch alcanzado
+        self.total_1h = 0.0
+        self.total_24h = 0.0
+        self.day = ''
+        self.total_day = 0.0
+
+    def advance(self, ts: float):
+        """Mueve las ventanas hasta el timestamp `ts` (epoch)."""
+        minute = int(ts // 60)
+        if self.minute is None:
+            self.minute = minute
+            self.day = _local_day(minute)
+            return
+        if minute <= self.minute:
+            return
+
+        if minute - self.minute >= MINUTES_24H:
+            # Más de un día sin datos: todas las ventanas quedan vacías
+            self.buckets = [0.0] * MINUTES_24H
+            self.total_1h = self.total_24h = 0.0
+        else:
+            for m in range(self.minute + 1, minute + 1):
+                self.total_1h -= self.buckets[(m - MINUTES_1H) % MINUTES_24H]
+                slot = m % MINUTES_24H
+                self.total_24h -= self.buckets[slot]
+                self.buckets[slot] = 0.0
+        self.minute = minute
+
+        day = _local_day(minute)
+        if day != self.day:
+            self.day = day
+            self.total_day = 0.0
+
+        # Evitar residuos negativos por redondeo
+        self.total_1h = max(0.0, self.total_1h)
+        self.total_24h = max(0.0, self.total_24h)
+
+    def add(self, ts: float, mm: float):
+        """Suma `mm` de lluvia caída en `ts` (epoch)."""
+        self.advance(ts)
+        if mm <= 0:
+            return
+        minute = int(ts // 60)
+        age = self.minute - minute  # > 0 si llega un dato atrasado
+        if age >= MINUTES_24H:
+            return
+        self.buckets[minute % MINUTES_24H] += mm
+        self.total_24h += mm
+        if age < MINUTES_1H:
+            self.total_1h += mm
+        if _local_day(minute) == self.day:
+            self.total_day += mm
+
+    def totals(self) -> Tuple[float, float, float]:
+        """(última hora, últimas 24 horas, desde medianoche local) en mm."""
+        return round(self.total_1h, 2), round(self.total_24h, 2), round(self.total_day, 2)
+
+    def to_dict(self) -> dict:
+        """Estado compacto: sólo los minutos con lluvia."""
+        if self.minute is None:
+            return {}
+        rain = {}
+        for age in range(MINUTES_24H):
+            m = self.minute - age
+            mm = self.buckets[m % MINUTES_24H]
+            if mm:
+                rain[str(m)] = round(mm, 3)
+        return {'minute': self.minute, 'day': self.day, 'day_mm': round(self.total_day, 3), 'rain': rain}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'RainAccumulator':
+        acc = cls()
+        if not d or d.get('minute') is None:
+            return acc
+        acc.minute = int(d['minute'])
+        acc.day = d.get('day', _local_day(acc.minute))
+        acc.total_day = float(d.get('day_mm', 0.0))
+        for m, mm in d.get('rain', {}).items():
+            m = int(m)
+            age = acc.minute - m
+            if 0 <= age < MINUTES_24H:
+                acc.buckets[m % MINUTES_24H] += mm
+                acc.total_24h += mm
+                if age < MINUTES_1H:
+                    acc.total_1h += mm
+        return acc
+
+
 class RainCalculator:
     """Calcula lluvia incremental a partir del acumulador total."""
 
     def __init__(self, state_file: str = '/var/log/wh2900/rain_state.json'):
         self.state_file = state_file
         self._state: Optional[RainState] = None
+        self._accumulator: Optional[RainAccumulator] = None
+        self._dirty = False  # hay lecturas o deltas sin guardar
 
     def _load_state(self) -> Optional[RainState]:
         """Carga el estado desde el archivo."""
@@ -57,14 +176,108 @@ class RainCalculator:
 
     def _save_state(self, state: RainState):
         """Guarda el estado al archivo."""
+        if self._accumulator is not None:
+            state.accumulator = self._accumulator.to_dict()
+        elif self._state is not None:
+            state.accumulator = self._state.accumulator
         self._state = state
         try:
             os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
-            with open(self.state_file, 'w') as f:
+            tmp = self.state_file + '.tmp'
+            with open(tmp, 'w') as f:
                 json.dump(state.to_dict(), f, indent=2)
+            os.replace(tmp, self.state_file)
         except (IOError, PermissionError) as e:
             print(f"Warning: no se pudo guardar rain_state: {e}")
 
+    @property
+    def accumulator(self) -> RainAccumulator:
+        """Totales 1h/24h/día, restaurados del archivo de estado."""
+        if self._accumulator is None:
+            state = self._load_state()
+            self._accumulator = RainAccumulator.from_dict(state.accumulator if state else {})
+        return self._accumulator
+
+    def save(self):
+        """
+        Guarda el estado actual (incluye los totales rodantes).
+
+        No escribe nada si desde el último save() no hubo lecturas del
+        acumulador (step/add_rain): correr las ventanas con rain_totals()
+        se rehace al cargar.
+        """
+        if not self._dirty:
+            return
+        state = self._load_state()
+        if state is not None:
+            state.last_update = datetime.now(timezone.utc).isoformat()
+            self._save_state(state)
+        self._dirty = False
+
+    def rollback(self):
+        """
+        Descarta lo calculado desde el último save() (el lote no se entregó).
+
+        El próximo acceso relee el archivo, así las lecturas del lote
+        vuelven a dar el mismo delta cuando se reintenta.
+        """
+        self._state = None
+        self._accumulator = None
+        self._dirty = False
+
+    def add_rain(self, when: datetime, delta_mm: float):
+        """Registra un delta de lluvia en los totales rodantes (se guarda con el estado)."""
+        self.accumulator.add(when.timestamp(), delta_mm)
+        self._dirty = True
+
+    def rain_totals(self, when: datetime) -> Optional[Tuple[float, float, float]]:
+        """
+        (última hora, últimas 24 horas, desde medianoche local) en mm a `when`,
+        o None si todavía no hubo ninguna lectura del acumulador.
+        """
+        acc = self.accumulator
+        if acc.minute is None:
+            return None
+        acc.advance(when.timestamp())
+        return acc.totals()
+
+    def step(self, when: datetime, current_rain_mm: float) -> Tuple[float, bool]:
+        """
+        Procesa una lectura del acumulador sin escribir el archivo.
+
+        Pensado para recorrer un lote ordenado por fecha y guardar una sola
+        vez al final con save(), cuando el lote se entregó (si no,
+        rollback()). Las lecturas no posteriores a la última guardada
+        (capturas ya entregadas que se vuelven a leer) no suman de nuevo.
+
+        Returns:
+            (delta_mm, is_valid), igual que calculate_rain_delta. Los
+            deltas válidos se suman a los totales rodantes.
+        """
+        state = self._load_state()
+        reading = when.isoformat()
+
+        if state is None:
+            # Primera lectura: baseline, no hay delta válido
+            self._state = RainState(last_rain_mm=current_rain_mm, last_update='', last_reading=reading)
+            self._dirty = True
+            return 0.0, False
+
+        if state.last_reading and datetime.fromisoformat(state.last_reading) >= when:
+            return 0.0, False  # lectura ya contabilizada
+
+        self._dirty = True
+        delta = current_rain_mm - state.last_rain_mm
+        state.last_rain_mm = current_rain_mm
+        state.last_reading = reading
+
+        if delta < 0 or delta > 100:
+            # Reset del contador (batería) o error de lectura
+            return 0.0, False
+
+        self.add_rain(when, delta)
+        return delta, True
+
     def calculate_rain_delta(self, current_rain_mm: float) -> Tuple[float, bool]:
         """
         Calcula la lluvia incremental.
@@ -93,7 +306,8 @@ class RainCalculator:
         # Actualizar estado
         self._save_state(RainState(
             last_rain_mm=current_rain_mm,
-            last_update=now
+            last_update=now,
+            last_reading=state.last_reading,
         ))
 
         if delta < 0:
@@ -0,0 +1,106 @@
+"""
+Estado persistente de rate limit para los targets HTTP.
+
+El processor corre como oneshot (timer de systemd), así que un
+`last_push_time` en memoria se pierde en cada ejecución y el intervalo
+mínimo entre pushes nunca se respetaba. Este módulo guarda la hora del
+último push exitoso por target en un JSON chico:
+
+    {"weathercloud": 1768903200.0, "wunderground": 1768903260.5}
+
+El archivo se lee una sola vez por proceso (lazy) y se escribe de forma
+atómica (tmp + rename) al final de cada ciclo, sólo si cambió. No hace
+falta ir a la DB como en integrations/base.py.
+
+Uso:
+    store = get_store('/var/log/wh2900/rate_limit.json')
+    store.get('weathercloud')            # datetime UTC o None
+    store.set('weathercloud', datetime.now(timezone.utc))
+    flush_all()                          # al final del ciclo
+"""
+import os
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+logger = logging.getLogger('wh2900')
+
+DEFAULT_STATE_FILE = '/var/log/wh2900/rate_limit.json'
+
+_stores: Dict[str, 'RateLimitStore'] = {}
+_stores_lock = threading.Lock()
+
+
+class RateLimitStore:
+    """Último push exitoso por target, respaldado en un archivo JSON."""
+
+    def __init__(self, state_file: str = DEFAULT_STATE_FILE):
+        self.state_file = state_file
+        self._times: Optional[Dict[str, float]] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, float]:
+        """Lee el archivo la primera vez que se necesita."""
+        if self._times is None:
+            try:
+                with open(self.state_file, 'r') as f:
+                    data = json.load(f)
+                self._times = {k: float(v) for k, v in data.items() if v is not None}
+            except FileNotFoundError:
+                self._times = {}
+            except (OSError, ValueError, AttributeError) as e:
+                logger.warning(f"Estado de rate limit ilegible ({self.state_file}): {e}")
+                self._times = {}
+        return self._times
+
+    def get(self, name: str) -> Optional[datetime]:
+        with self._lock:
+            ts = self._load().get(name)
+        return datetime.fromtimestamp(ts, timezone.utc) if ts is not None else None
+
+    def set(self, name: str, when: Optional[datetime]):
+        """Registra un push (None = olvidar, fuerza el próximo push)."""
+        with self._lock:
+            times = self._load()
+            if when is None:
+                if times.pop(name, None) is not None:
+                    self._dirty = True
+            else:
+                times[name] = when.timestamp()
+                self._dirty = True
+
+    def flush(self):
+        """Escribe el archivo de forma atómica si hubo cambios."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp = self.state_file + '.tmp'
+            try:
+                os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+                with open(tmp, 'w') as f:
+                    json.dump(self._times, f)
+                os.replace(tmp, self.state_file)
+                self._dirty = False
+            except OSError as e:
+                logger.error(f"Error guardando estado de rate limit: {e}")
+
+
+def get_store(state_file: Optional[str] = None) -> RateLimitStore:
+    """Retorna el store compartido para `state_file` (creándolo si hace falta)."""
+    state_file = state_file or DEFAULT_STATE_FILE
+    with _stores_lock:
+        store = _stores.get(state_file)
+        if store is None:
+            store = _stores[state_file] = RateLimitStore(state_file)
+        return store
+
+
+def flush_all():
+    """Persiste todos los stores con cambios (al final de cada ciclo)."""
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.flush()
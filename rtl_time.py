@@ -0,0 +1,47 @@
+"""
+Parseo rápido del campo `time` de rtl_433 (opción -M time:utc).
+
+rtl_433 escribe siempre "YYYY-mm-dd HH:MM:SS" en UTC. En vez de
+datetime.strptime (que interpreta el formato en cada llamada) se cortan
+los campos por posición, y el resultado se memoriza por segundo: las
+repeticiones de una transmisión y los paquetes de una ráfaga comparten el
+mismo string, así que en un replay la mayoría de las llamadas son un hit
+del cache.
+
+    fecha = parse_utc("2026-01-20 10:00:01")    # datetime con tz UTC
+    ts = parse_epoch("2026-01-20 10:00:01")     # int, segundos epoch
+    hora = to_local("2026-01-20 10:00:01")      # datetime en hora local
+
+Un string con otro formato cae a strptime, que levanta ValueError igual
+que antes.
+"""
+from datetime import datetime, timezone
+from functools import lru_cache
+
+RTL_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+CACHE_SIZE = 4096  # segundos distintos memorizados (~1 hora de capturas)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_utc(time_str: str) -> datetime:
+    """Fecha UTC (datetime aware) de un `time` de rtl_433."""
+    s = time_str
+    if len(s) == 19 and s[4] == '-' and s[7] == '-' and s[10] == ' ' and s[13] == ':' and s[16] == ':':
+        try:
+            return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                            int(s[11:13]), int(s[14:16]), int(s[17:19]), tzinfo=timezone.utc)
+        except ValueError:
+            pass  # fecha inválida: strptime arma el mensaje de error
+    return datetime.strptime(s, RTL_TIME_FORMAT).replace(tzinfo=timezone.utc)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_epoch(time_str: str) -> int:
+    """Segundos epoch de un `time` de rtl_433."""
+    return int(parse_utc(time_str).timestamp())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def to_local(time_str: str) -> datetime:
+    """Un `time` de rtl_433 convertido a la zona horaria local."""
+    return parse_utc(time_str).astimezone()
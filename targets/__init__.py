@@ -3,11 +3,13 @@ Módulo de targets para wh2900.
 Cada target es un destino donde enviar los datos meteorológicos.
 """
 from .base import Target, TargetResult, WeatherRecord
+from .dispatcher import TargetDispatcher
 
 __all__ = [
     'Target',
     'TargetResult',
     'WeatherRecord',
+    'TargetDispatcher',
     'get_target_class',
 ]
 
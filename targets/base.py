@@ -5,6 +5,7 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
 from datetime import datetime
+import jsoncodec
 import logging
 import os
 
@@ -44,24 +45,119 @@ def setup_logger(name: str, log_file: str, level=logging.INFO) -> logging.Logger
 logger = setup_logger('wh2900', 'processor.log')
 
 
-@dataclass
+# Campos de WeatherRecord en orden de constructor (raw_json va aparte)
+RECORD_FIELDS = (
+    'filepath', 'filename', 'fecha_medicion', 'raw_data', 'rssi', 'packet_type',
+    'temp_c', 'humidity', 'wind_dir', 'wind_speed_ms', 'gust_ms', 'rain_mm',
+    'light_wm2', 'uvi', 'rain_1h_mm', 'rain_24h_mm', 'rain_day_mm',
+)
+
+
 class WeatherRecord:
-    """Datos meteorológicos decodificados de un paquete WH2900."""
-    filepath: str
-    filename: str
-    fecha_medicion: datetime
-    raw_json: Dict[str, Any]
-    raw_data: str
-    rssi: Optional[float] = None
-    packet_type: Optional[int] = None
-    temp_c: Optional[float] = None
-    humidity: Optional[int] = None
-    wind_dir: Optional[float] = None
-    wind_speed_ms: Optional[float] = None
-    gust_ms: Optional[float] = None
-    rain_mm: Optional[float] = None
-    light_wm2: Optional[float] = None
-    uvi: Optional[int] = None
+    """
+    Datos meteorológicos decodificados de un paquete WH2900.
+
+    Registro compacto (__slots__): en vez del dict de rtl_433 guarda los
+    bytes JSON originales en `raw` y los parsea recién cuando alguien pide
+    `raw_json`. En un backlog grande los dicts no quedan vivos en la lista
+    de registros. Si se construye con un dict (journal, stream) se guarda
+    ese dict tal cual.
+    """
+    __slots__ = RECORD_FIELDS + ('raw', '_raw_json')
+
+    def __init__(
+        self,
+        filepath: str,
+        filename: str,
+        fecha_medicion: datetime,
+        raw_json: Optional[Dict[str, Any]] = None,
+        raw_data: str = '',
+        rssi: Optional[float] = None,
+        packet_type: Optional[int] = None,
+        temp_c: Optional[float] = None,
+        humidity: Optional[int] = None,
+        wind_dir: Optional[float] = None,
+        wind_speed_ms: Optional[float] = None,
+        gust_ms: Optional[float] = None,
+        rain_mm: Optional[float] = None,
+        light_wm2: Optional[float] = None,
+        uvi: Optional[int] = None,
+        # Totales de lluvia (mm) calculados por RainCalculator a la fecha del registro
+        rain_1h_mm: Optional[float] = None,
+        rain_24h_mm: Optional[float] = None,
+        rain_day_mm: Optional[float] = None,
+        raw: Optional[bytes] = None,  # JSON original de la captura
+    ):
+        self.filepath = filepath
+        self.filename = filename
+        self.fecha_medicion = fecha_medicion
+        self.raw_data = raw_data
+        self.rssi = rssi
+        self.packet_type = packet_type
+        self.temp_c = temp_c
+        self.humidity = humidity
+        self.wind_dir = wind_dir
+        self.wind_speed_ms = wind_speed_ms
+        self.gust_ms = gust_ms
+        self.rain_mm = rain_mm
+        self.light_wm2 = light_wm2
+        self.uvi = uvi
+        self.rain_1h_mm = rain_1h_mm
+        self.rain_24h_mm = rain_24h_mm
+        self.rain_day_mm = rain_day_mm
+        self.raw = raw
+        self._raw_json = None if raw is not None else raw_json
+
+    @property
+    def raw_json(self) -> Dict[str, Any]:
+        """JSON de rtl_433 como dict (se parsea en cada acceso, no se cachea)."""
+        if self._raw_json is not None:
+            return self._raw_json
+        if self.raw is None:
+            return {}
+        return jsoncodec.loads(self.raw)
+
+    @property
+    def raw_text(self) -> str:
+        """JSON de rtl_433 como texto, sin pasar por un dict si se tienen los bytes."""
+        if self.raw is not None:
+            return self.raw.decode()
+        return jsoncodec.dumps(self._raw_json or {})
+
+    def replace(self, **changes) -> 'WeatherRecord':
+        """Copia del registro con los campos indicados cambiados."""
+        values = {name: getattr(self, name) for name in RECORD_FIELDS}
+        values.update(changes)
+        if 'raw_json' not in changes and 'raw' not in changes:
+            values['raw'] = self.raw
+            values['raw_json'] = self._raw_json
+        return WeatherRecord(**values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Campos del registro; el JSON original va como texto en 'raw'."""
+        d = {name: getattr(self, name) for name in RECORD_FIELDS}
+        d['raw'] = self.raw_text
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> 'WeatherRecord':
+        """Inverso de to_dict (acepta también 'raw_json' como dict)."""
+        d = dict(d)
+        raw = d.pop('raw', None)
+        if isinstance(raw, str):
+            raw = raw.encode()
+        return cls(raw=raw, **d)
+
+    def __eq__(self, other):
+        if not isinstance(other, WeatherRecord):
+            return NotImplemented
+        return all(getattr(self, n) == getattr(other, n) for n in RECORD_FIELDS) \
+            and self.raw_json == other.raw_json
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"WeatherRecord(filename={self.filename!r}, fecha_medicion={self.fecha_medicion!r})"
 
 
 @dataclass
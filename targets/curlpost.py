@@ -6,6 +6,7 @@ import json
 import requests
 from typing import Dict
 from .base import Target, TargetResult, WeatherRecord, logger
+from http_pool import HttpClient
 
 
 class CurlPostTarget(Target):
@@ -17,6 +18,7 @@ class CurlPostTarget(Target):
         super().__init__(name, config)
         self.url = config.get('url', '')
         self.method = config.get('method', 'POST').upper()
+        self.http = HttpClient.from_config(config)
 
         # API key desde env o config
         api_key_env = config.get('api_key_env', '')
@@ -84,18 +86,16 @@ class CurlPostTarget(Target):
 
         try:
             if self.method == 'POST':
-                response = requests.post(
+                response = self.http.post(
                     self.url,
                     json=payload,
                     headers=headers,
-                    timeout=30
                 )
             else:
-                response = requests.get(
+                response = self.http.get(
                     self.url,
                     params=payload,
                     headers=headers,
-                    timeout=30
                 )
 
             if response.status_code in (200, 201, 202, 204):
@@ -0,0 +1,117 @@
+"""
+Dispatcher de targets - envía los registros a todos los targets en paralelo.
+
+Cada target corre en su propio thread. El ciclo tiene un deadline global
+(`run_deadline`) y cada target puede tener un presupuesto menor
+(`timeout_budget` en su sección del INI). Un target que no responde a
+tiempo se reporta como fallido sin demorar al resto.
+
+Los threads son daemon (no un ThreadPoolExecutor, cuyos workers se
+esperan al salir del intérprete): un target colgado tampoco retiene el
+proceso oneshot más allá del deadline.
+
+Si se pasa un motor asyncio (async_delivery.AsyncDeliveryEngine), los
+targets HTTP que lo soportan se envían desde su event loop en vez de
+ocupar un thread cada uno.
+"""
+import time
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, List, Union
+
+from .base import Target, TargetResult, WeatherRecord
+
+DEFAULT_RUN_DEADLINE = 50.0  # segundos, por debajo del timer de 60s
+
+
+class TargetDispatcher:
+    """Fan-out concurrente de `Target.send` con deadline por ciclo."""
+
+    def __init__(self, targets: List[Target], run_deadline: float = DEFAULT_RUN_DEADLINE, engine=None):
+        self.targets = targets
+        self.run_deadline = run_deadline
+        self.engine = engine
+        # Envío en curso por target: si uno quedó colgado de un ciclo anterior
+        # no se le superpone otro (los targets no son reentrantes).
+        self._inflight: Dict[str, Future] = {}
+
+    def budget(self, target: Target) -> float:
+        """Segundos que se espera a `target` dentro del ciclo."""
+        budget = float(target.config.get('timeout_budget', self.run_deadline))
+        return min(budget, self.run_deadline)
+
+    def send(self, records: Union[List[WeatherRecord], Dict[str, List[WeatherRecord]]]) -> List[TargetResult]:
+        """
+        Envía `records` a todos los targets y espera los resultados.
+
+        `records` puede ser un dict nombre de target -> registros cuando cada
+        target recibe una tanda distinta (ej. lo pendiente en el outbox).
+
+        Returns:
+            Un TargetResult por target, en el mismo orden que `self.targets`.
+        """
+        started = time.monotonic()
+        futures: Dict[str, Future] = {}
+        results: Dict[str, TargetResult] = {}
+
+        for target in self.targets:
+            previous = self._inflight.get(target.name)
+            if previous is not None and not previous.done():
+                results[target.name] = TargetResult(
+                    success=False,
+                    target_name=target.name,
+                    message="Envío anterior todavía en curso"
+                )
+                continue
+            batch = records.get(target.name, []) if isinstance(records, dict) else records
+            futures[target.name] = self._inflight[target.name] = self._submit(target, batch)
+
+        for target in self.targets:
+            future = futures.get(target.name)
+            if future is None:
+                continue
+            budget = self.budget(target)
+            remaining = started + budget - time.monotonic()
+            try:
+                results[target.name] = future.result(timeout=max(0.0, remaining))
+            except FutureTimeout:
+                future.cancel()  # cancela el request async; un thread en curso sigue hasta su timeout HTTP
+                target.log_error(f"Timeout: sin respuesta en {budget:g}s")
+                results[target.name] = TargetResult(
+                    success=False,
+                    target_name=target.name,
+                    message=f"Timeout ({budget:g}s)"
+                )
+            except Exception as e:
+                target.log_error(f"Error inesperado: {e}")
+                results[target.name] = TargetResult(
+                    success=False,
+                    target_name=target.name,
+                    message=f"Error inesperado: {e}"
+                )
+
+        return [results[t.name] for t in self.targets]
+
+    def _submit(self, target: Target, records: List[WeatherRecord]) -> Future:
+        if self.engine is not None and self.engine.supports(target):
+            return self.engine.submit_target(target, records)
+        future: Future = Future()
+        threading.Thread(target=_run, args=(future, target.send, records),
+                         name=f'wh2900-target-{target.name}', daemon=True).start()
+        return future
+
+    def shutdown(self):
+        """Descarta los envíos en curso (sus threads daemon no demoran la salida)."""
+        for future in self._inflight.values():
+            future.cancel()
+        self._inflight.clear()
+
+
+def _run(future: Future, func, *args):
+    """Ejecuta `func` en el thread del target y publica el resultado en `future`."""
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        future.set_result(func(*args))
+    except BaseException as e:
+        future.set_exception(e)
@@ -1,12 +1,30 @@
 """
 Target HTTP Service - envía datos a servicios como Weathercloud, Weather Underground, Windguru.
+
+El envío está separado en pasos (select_record → build_request →
+check_response → finish) para que el mismo target pueda enviarse de forma
+sincrónica (`send`) o desde el motor asyncio de async_delivery.py.
 """
 import os
+import json
 import hashlib
 import requests
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
 from .base import Target, TargetResult, WeatherRecord, logger
+from http_pool import HttpClient
+from rate_limit import get_store
+from aggregator import WindowAggregator
+
+
+@dataclass
+class HttpRequest:
+    """Request HTTP a enviar a un servicio (independiente del cliente HTTP)."""
+    method: str
+    url: str
+    json: Optional[Any] = None
 
 
 class HttpServiceTarget(Target):
@@ -18,7 +36,17 @@ class HttpServiceTarget(Target):
     def __init__(self, name: str, config: Dict[str, str]):
         super().__init__(name, config)
         self.service = config.get('service', 'weathercloud')
-        self.last_push_time: Optional[datetime] = None
+        self.min_interval_seconds = float(config.get('min_interval', self.min_interval_seconds))
+        # Último push exitoso, persistido entre ejecuciones del processor
+        self.rate_limit = get_store(config.get('rate_limit_file'))
+        # Ventana (segundos) para promediar viento/temp/hum entre pushes; 0 = última muestra
+        self.aggregate_window = float(config.get('aggregate_window', 0))
+        self.aggregate_state_file = config.get('aggregate_state_file',
+                                               f'/var/log/wh2900/aggregate_{name}.json')
+        self._aggregator: Optional[WindowAggregator] = None
+        self.http = HttpClient.from_config(config)
+        # Reemplaza scheme://host de la URL del servicio (ej. stub local para pruebas)
+        self.endpoint = config.get('endpoint', '')
 
         # Cargar credenciales desde env
         self._load_env()
@@ -46,6 +74,14 @@ class HttpServiceTarget(Target):
                             key, value = line.split('=', 1)
                             os.environ.setdefault(key.strip(), value.strip())
 
+    @property
+    def last_push_time(self) -> Optional[datetime]:
+        return self.rate_limit.get(self.name)
+
+    @last_push_time.setter
+    def last_push_time(self, when: Optional[datetime]):
+        self.rate_limit.set(self.name, when)
+
     def _can_push(self) -> bool:
         """Verifica si pasó suficiente tiempo desde el último push."""
         if self.last_push_time is None:
@@ -53,6 +89,54 @@ class HttpServiceTarget(Target):
         elapsed = (datetime.now(timezone.utc) - self.last_push_time).total_seconds()
         return elapsed >= self.min_interval_seconds
 
+    def _load_aggregator(self) -> WindowAggregator:
+        """La ventana de muestras, restaurada del archivo de estado la primera vez."""
+        if self._aggregator is None:
+            try:
+                with open(self.aggregate_state_file) as f:
+                    self._aggregator = WindowAggregator.from_dict(json.load(f), self.aggregate_window)
+            except (OSError, ValueError, TypeError):
+                self._aggregator = WindowAggregator(self.aggregate_window)
+        return self._aggregator
+
+    def _feed_aggregator(self, records: list[WeatherRecord]):
+        """Agrega las muestras nuevas a la ventana y guarda su estado."""
+        agg = self._load_aggregator()
+        added = 0
+        for r in sorted(records, key=lambda r: r.fecha_medicion):
+            added += agg.add(r)
+        if not added:
+            return
+        tmp = self.aggregate_state_file + '.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(agg.to_dict(), f)
+            os.replace(tmp, self.aggregate_state_file)
+        except OSError as e:
+            logger.warning(f"[{self.name}] Error guardando ventana de agregación: {e}")
+
+    def _aggregate(self, r: WeatherRecord) -> WeatherRecord:
+        """Reemplaza viento, dirección, temp y humedad por el resumen de la ventana."""
+        summary = self._load_aggregator().summary()
+        if summary is None:
+            return r
+        changes = {
+            'wind_speed_ms': summary.wind_speed_ms,
+            'gust_ms': summary.gust_ms,
+            'wind_dir': summary.wind_dir,
+            'temp_c': summary.temp_c,
+            'humidity': round(summary.humidity) if summary.humidity is not None else None,
+        }
+        return r.replace(**{k: v for k, v in changes.items() if v is not None})
+
+    def _url(self, url: str) -> str:
+        """Aplica el override de `endpoint` a una URL de servicio."""
+        if not self.endpoint:
+            return url
+        endpoint = urlsplit(self.endpoint)
+        parts = urlsplit(url)
+        return urlunsplit((endpoint.scheme, endpoint.netloc, parts.path, parts.query, parts.fragment))
+
     def _build_weathercloud_url(self, r: WeatherRecord) -> str:
         """Construye URL para Weathercloud API."""
         parts = [
@@ -71,8 +155,10 @@ class HttpServiceTarget(Target):
             parts.append(f"wdir/{int(r.wind_dir)}")
         if r.gust_ms is not None:
             parts.append(f"wspdhi/{int(r.gust_ms * 10)}")
-        if r.rain_mm is not None:
-            parts.append(f"rain/{int(r.rain_mm * 10)}")
+        # rain = lluvia del día
+        rain_day = r.rain_day_mm if r.rain_day_mm is not None else r.rain_mm
+        if rain_day is not None:
+            parts.append(f"rain/{int(rain_day * 10)}")
         if r.light_wm2 is not None:
             parts.append(f"solarrad/{int(r.light_wm2 * 10)}")
         if r.uvi is not None:
@@ -104,9 +190,12 @@ class HttpServiceTarget(Target):
         if r.gust_ms is not None:
             gust_mph = r.gust_ms * 2.237
             params.append(f"windgustmph={gust_mph:.1f}")
-        if r.rain_mm is not None:
-            rain_in = r.rain_mm / 25.4
-            params.append(f"rainin={rain_in:.2f}")
+        # rainin = última hora, dailyrainin = desde medianoche local
+        rain_1h = r.rain_1h_mm if r.rain_1h_mm is not None else r.rain_mm
+        if rain_1h is not None:
+            params.append(f"rainin={rain_1h / 25.4:.2f}")
+        if r.rain_day_mm is not None:
+            params.append(f"dailyrainin={r.rain_day_mm / 25.4:.2f}")
         if r.uvi is not None:
             params.append(f"UV={r.uvi}")
         if r.light_wm2 is not None:
@@ -138,9 +227,12 @@ class HttpServiceTarget(Target):
         if r.gust_ms is not None:
             gust_mph = r.gust_ms * 2.237
             params.append(f"windgustmph={gust_mph:.1f}")
-        if r.rain_mm is not None:
-            rain_in = r.rain_mm / 25.4
-            params.append(f"rainin={rain_in:.2f}")
+        # rainin = última hora, dailyrainin = desde medianoche local
+        rain_1h = r.rain_1h_mm if r.rain_1h_mm is not None else r.rain_mm
+        if rain_1h is not None:
+            params.append(f"rainin={rain_1h / 25.4:.2f}")
+        if r.rain_day_mm is not None:
+            params.append(f"dailyrainin={r.rain_day_mm / 25.4:.2f}")
         if r.uvi is not None:
             params.append(f"UV={r.uvi}")
         if r.light_wm2 is not None:
@@ -149,8 +241,8 @@ class HttpServiceTarget(Target):
         params.append("softwaretype=daza_wh2900_v1.1")
         return f"{base}?{'&'.join(params)}"
 
-    def _send_openweathermap(self, r: WeatherRecord) -> tuple[bool, str]:
-        """Envía datos a OpenWeatherMap Stations API (POST JSON)."""
+    def _build_openweathermap_request(self, r: WeatherRecord) -> HttpRequest:
+        """Request para OpenWeatherMap Stations API (POST JSON)."""
         url = f"http://api.openweathermap.org/data/3.0/measurements?appid={self.service_key}"
 
         # Construir payload
@@ -169,25 +261,16 @@ class HttpServiceTarget(Target):
             measurement["wind_gust"] = r.gust_ms
         if r.wind_dir is not None:
             measurement["wind_deg"] = int(r.wind_dir)
-        if r.rain_mm is not None:
-            measurement["rain_1h"] = r.rain_mm
+        rain_1h = r.rain_1h_mm if r.rain_1h_mm is not None else r.rain_mm
+        if rain_1h is not None:
+            measurement["rain_1h"] = rain_1h
+        if r.rain_24h_mm is not None:
+            measurement["rain_24h"] = r.rain_24h_mm
 
-        try:
-            response = requests.post(
-                url,
-                json=[measurement],
-                headers={"Content-Type": "application/json"},
-                timeout=30
-            )
-            if response.status_code == 204:
-                return True, f"temp={r.temp_c}°C, hum={r.humidity}%"
-            else:
-                return False, f"HTTP {response.status_code}: {response.text[:100]}"
-        except requests.RequestException as e:
-            return False, str(e)
+        return HttpRequest('POST', url, json=[measurement])
 
-    def _send_windy(self, r: WeatherRecord) -> tuple[bool, str]:
-        """Envía datos a Windy Stations API (POST JSON)."""
+    def _build_windy_request(self, r: WeatherRecord) -> HttpRequest:
+        """Request para Windy Stations API (POST JSON)."""
         url = f"https://stations.windy.com/pws/update/{self.service_key}"
 
         observation = {
@@ -205,41 +288,32 @@ class HttpServiceTarget(Target):
             observation["gust"] = r.gust_ms
         if r.wind_dir is not None:
             observation["winddir"] = int(r.wind_dir)
-        # rain_mm ahora es el delta incremental (calculado en el procesador)
-        if r.rain_mm is not None:
-            observation["precip"] = r.rain_mm
+        # precip = lluvia de la última hora (si no hay totales, el delta incremental)
+        rain_1h = r.rain_1h_mm if r.rain_1h_mm is not None else r.rain_mm
+        if rain_1h is not None:
+            observation["precip"] = rain_1h
         if r.uvi is not None:
             observation["uv"] = r.uvi
 
-        payload = {"observations": [observation]}
+        return HttpRequest('POST', url, json={"observations": [observation]})
 
-        try:
-            response = requests.post(
-                url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=30
-            )
-            # Windy devuelve 400 pero con errors vacíos = éxito
-            if response.status_code in (200, 201, 204):
-                return True, f"temp={r.temp_c}°C, hum={r.humidity}%"
-            elif response.status_code == 400:
-                # Verificar si realmente hay errores
-                try:
-                    data = response.json()
-                    # Estructura: {"update":{"update":{...},"errors":{...}}}
-                    update_data = data.get('update', {})
-                    errors = update_data.get('errors', {})
-                    # Si no hay errores O los arrays de errores están vacíos = éxito
-                    if not errors or (not errors.get('observations') and not errors.get('stations')):
-                        return True, f"temp={r.temp_c}°C, hum={r.humidity}%"
-                except Exception as e:
-                    logger.error(f"Windy JSON parse error: {e}")
-                return False, f"HTTP {response.status_code}: {response.text[:100]}"
-            else:
-                return False, f"HTTP {response.status_code}: {response.text[:100]}"
-        except requests.RequestException as e:
-            return False, str(e)
+    def _check_windy_response(self, status: int, text: str) -> bool:
+        """Windy devuelve 400 pero con errors vacíos = éxito."""
+        if status in (200, 201, 204):
+            return True
+        if status == 400:
+            # Verificar si realmente hay errores
+            try:
+                data = json.loads(text)
+                # Estructura: {"update":{"update":{...},"errors":{...}}}
+                update_data = data.get('update', {})
+                errors = update_data.get('errors', {})
+                # Si no hay errores O los arrays de errores están vacíos = éxito
+                if not errors or (not errors.get('observations') and not errors.get('stations')):
+                    return True
+            except Exception as e:
+                logger.error(f"Windy JSON parse error: {e}")
+        return False
 
     def _build_windguru_url(self, r: WeatherRecord) -> str:
         """Construye URL para Windguru API con autenticación MD5."""
@@ -278,10 +352,45 @@ class HttpServiceTarget(Target):
 
         return f"{base}?{'&'.join(params)}"
 
-    def send(self, records: list[WeatherRecord]) -> TargetResult:
-        """Envía el registro más reciente al servicio HTTP."""
+    def build_request(self, r: WeatherRecord) -> Optional[HttpRequest]:
+        """Construye el request según el servicio (None si el servicio es desconocido)."""
+        if self.service == 'weathercloud':
+            request = HttpRequest('GET', self._build_weathercloud_url(r))
+        elif self.service == 'wunderground':
+            request = HttpRequest('GET', self._build_wunderground_url(r))
+        elif self.service == 'pwsweather':
+            request = HttpRequest('GET', self._build_pwsweather_url(r))
+        elif self.service == 'windguru':
+            request = HttpRequest('GET', self._build_windguru_url(r))
+        elif self.service == 'openweathermap':
+            # OpenWeatherMap usa POST, no GET
+            request = self._build_openweathermap_request(r)
+        elif self.service == 'windy':
+            # Windy usa POST JSON
+            request = self._build_windy_request(r)
+        else:
+            return None
+        request.url = self._url(request.url)
+        return request
+
+    def check_response(self, status: int, text: str) -> bool:
+        """Indica si la respuesta HTTP del servicio es un push exitoso."""
+        if self.service == 'openweathermap':
+            return status == 204
+        if self.service == 'windy':
+            return self._check_windy_response(status, text)
+        return status == 200
+
+    def select_record(self, records: list[WeatherRecord]) -> Tuple[Optional[WeatherRecord], Optional[TargetResult]]:
+        """
+        Elige el registro a enviar.
+
+        Returns:
+            (registro, None) si hay que enviar, o (None, resultado) si no
+            corresponde enviar nada en este ciclo.
+        """
         if not self.active:
-            return TargetResult(
+            return None, TargetResult(
                 success=True,
                 target_name=self.name,
                 message="Target inactivo",
@@ -289,15 +398,19 @@ class HttpServiceTarget(Target):
             )
 
         if not records:
-            return TargetResult(
+            return None, TargetResult(
                 success=True,
                 target_name=self.name,
                 message="Sin registros",
                 records_processed=0
             )
 
+        # Las muestras se acumulan aunque este ciclo no toque push
+        if self.aggregate_window > 0:
+            self._feed_aggregator(records)
+
         if not self._can_push():
-            return TargetResult(
+            return None, TargetResult(
                 success=True,
                 target_name=self.name,
                 message="Rate limit (esperando)",
@@ -305,81 +418,59 @@ class HttpServiceTarget(Target):
             )
 
         # Buscar el registro más reciente con datos completos
-        best_record = None
         for r in reversed(records):
             if r.temp_c is not None:
-                best_record = r
-                break
-
-        if not best_record:
+                return (self._aggregate(r) if self.aggregate_window > 0 else r), None
+
+        return None, TargetResult(
+            success=True,
+            target_name=self.name,
+            message="Sin datos de temperatura",
+            records_processed=0
+        )
+
+    def unknown_service_result(self) -> TargetResult:
+        return TargetResult(
+            success=False,
+            target_name=self.name,
+            message=f"Servicio desconocido: {self.service}"
+        )
+
+    def finish(self, record: WeatherRecord, success: bool, error: str = '') -> TargetResult:
+        """Registra el resultado de un push (rate limit + logs)."""
+        if success:
+            self.last_push_time = datetime.now(timezone.utc)
+            msg = f"temp={record.temp_c}°C, hum={record.humidity}%"
+            self.log_success(msg)
             return TargetResult(
                 success=True,
                 target_name=self.name,
-                message="Sin datos de temperatura",
-                records_processed=0
+                message=msg,
+                records_processed=1
             )
 
-        # Construir URL según el servicio
-        if self.service == 'weathercloud':
-            url = self._build_weathercloud_url(best_record)
-        elif self.service == 'wunderground':
-            url = self._build_wunderground_url(best_record)
-        elif self.service == 'pwsweather':
-            url = self._build_pwsweather_url(best_record)
-        elif self.service == 'windguru':
-            url = self._build_windguru_url(best_record)
-        elif self.service == 'openweathermap':
-            # OpenWeatherMap usa POST, no GET
-            success, msg = self._send_openweathermap(best_record)
-            if success:
-                self.last_push_time = datetime.now(timezone.utc)
-                self.log_success(msg)
-                return TargetResult(success=True, target_name=self.name, message=msg, records_processed=1)
-            else:
-                self.log_error(msg)
-                return TargetResult(success=False, target_name=self.name, message=msg)
-        elif self.service == 'windy':
-            # Windy usa POST JSON
-            success, msg = self._send_windy(best_record)
-            if success:
-                self.last_push_time = datetime.now(timezone.utc)
-                self.log_success(msg)
-                return TargetResult(success=True, target_name=self.name, message=msg, records_processed=1)
-            else:
-                self.log_error(msg)
-                return TargetResult(success=False, target_name=self.name, message=msg)
-        else:
-            return TargetResult(
-                success=False,
-                target_name=self.name,
-                message=f"Servicio desconocido: {self.service}"
-            )
+        self.log_error(error)
+        return TargetResult(
+            success=False,
+            target_name=self.name,
+            message=error
+        )
 
-        try:
-            response = requests.get(url, timeout=30)
-            if response.status_code == 200:
-                self.last_push_time = datetime.now(timezone.utc)
-                msg = f"temp={best_record.temp_c}°C, hum={best_record.humidity}%"
-                self.log_success(msg)
-                return TargetResult(
-                    success=True,
-                    target_name=self.name,
-                    message=msg,
-                    records_processed=1
-                )
-            else:
-                msg = f"HTTP {response.status_code}: {response.text[:100]}"
-                self.log_error(msg)
-                return TargetResult(
-                    success=False,
-                    target_name=self.name,
-                    message=msg
-                )
+    def send(self, records: list[WeatherRecord]) -> TargetResult:
+        """Envía el registro más reciente al servicio HTTP."""
+        best_record, result = self.select_record(records)
+        if result is not None:
+            return result
 
+        request = self.build_request(best_record)
+        if request is None:
+            return self.unknown_service_result()
+
+        try:
+            response = self.http.request(request.method, request.url, json=request.json)
         except requests.RequestException as e:
-            self.log_error(str(e))
-            return TargetResult(
-                success=False,
-                target_name=self.name,
-                message=str(e)
-            )
+            return self.finish(best_record, False, str(e))
+
+        if self.check_response(response.status_code, response.text):
+            return self.finish(best_record, True)
+        return self.finish(best_record, False, f"HTTP {response.status_code}: {response.text[:100]}")
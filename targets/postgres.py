@@ -1,10 +1,33 @@
 """
 Target PostgreSQL - inserta datos en la base de datos.
+
+Los registros se insertan en lotes (execute_values, una transacción por
+lote). Si un lote falla se reintenta fila por fila para aislar sólo las
+filas con error.
 """
+import time
 import psycopg2
-from psycopg2.extras import Json
-from typing import Dict
+from psycopg2.extras import execute_values
+from typing import Dict, List, Tuple
 from .base import Target, TargetResult, WeatherRecord, logger
+from db_pool import get_pool
+
+INSERT_DATARAW = """
+    insert into dataraw (filename, data)
+    values %s
+    on conflict (filename) do nothing
+"""
+# El JSON va como texto (los bytes originales de la captura) y lo convierte postgres
+DATARAW_TEMPLATE = "(%s, %s::jsonb)"
+
+INSERT_MEDICION = """
+    insert into medicion (
+        filename, fecha_medicion, packet_type, temp_c, humidity,
+        wind_dir, wind_speed_ms, gust_ms, light_wm2, uvi, rain_mm,
+        rssi, raw_data
+    ) values %s
+    on conflict (filename) do nothing
+"""
 
 
 class PostgresTarget(Target):
@@ -22,6 +45,74 @@ class PostgresTarget(Target):
         }
         if config.get('password'):
             self.db_config['password'] = config['password']
+        self.batch_size = int(config.get('batch_size', 500))
+        self.pool = get_pool(
+            self.db_config,
+            maxconn=int(config.get('pool_size', 2)),
+            retries=int(config.get('connect_retries', 2)),
+        )
+
+    @staticmethod
+    def _dataraw_row(r: WeatherRecord) -> tuple:
+        return (r.filename, r.raw_text)
+
+    @staticmethod
+    def _medicion_row(r: WeatherRecord) -> tuple:
+        return (
+            r.filename, r.fecha_medicion, r.packet_type,
+            r.temp_c, r.humidity, r.wind_dir,
+            r.wind_speed_ms, r.gust_ms, r.light_wm2,
+            r.uvi, r.rain_mm, r.rssi, r.raw_data
+        )
+
+    def _insert_batch(self, conn, batch: List[WeatherRecord]) -> Tuple[int, int]:
+        """Inserta un lote en una sola transacción. Retorna (medicion, dataraw) insertados."""
+        with conn.cursor() as cur:
+            inserted = execute_values(
+                cur, INSERT_DATARAW + " returning 1",
+                [self._dataraw_row(r) for r in batch],
+                template=DATARAW_TEMPLATE, page_size=len(batch), fetch=True,
+            )
+            inserted_dataraw = len(inserted)
+
+            inserted_medicion = 0
+            decoded = [self._medicion_row(r) for r in batch if r.packet_type is not None]
+            if decoded:
+                inserted = execute_values(
+                    cur, INSERT_MEDICION + " returning 1",
+                    decoded, page_size=len(decoded), fetch=True,
+                )
+                inserted_medicion = len(inserted)
+
+        conn.commit()
+        return inserted_medicion, inserted_dataraw
+
+    def _insert_rows(self, conn, batch: List[WeatherRecord]) -> Tuple[int, int]:
+        """Fallback fila por fila: aísla las filas con error del resto del lote."""
+        inserted_medicion = 0
+        inserted_dataraw = 0
+
+        with conn.cursor() as cur:
+            for r in batch:
+                try:
+                    # Insertar en dataraw (siempre)
+                    execute_values(cur, INSERT_DATARAW, [self._dataraw_row(r)], template=DATARAW_TEMPLATE)
+                    if cur.rowcount > 0:
+                        inserted_dataraw += 1
+
+                    # Insertar en medicion (si tiene datos decodificados)
+                    if r.packet_type is not None:
+                        execute_values(cur, INSERT_MEDICION, [self._medicion_row(r)])
+                        if cur.rowcount > 0:
+                            inserted_medicion += 1
+
+                    conn.commit()
+
+                except Exception as e:
+                    conn.rollback()
+                    self.log_error(f"Error insertando {r.filename}: {e}")
+
+        return inserted_medicion, inserted_dataraw
 
     def send(self, records: list[WeatherRecord]) -> TargetResult:
         """Inserta registros en PostgreSQL."""
@@ -42,7 +133,7 @@ class PostgresTarget(Target):
             )
 
         try:
-            conn = psycopg2.connect(**self.db_config)
+            conn = self.pool.getconn()
         except Exception as e:
             self.log_error(f"Error conexión: {e}")
             return TargetResult(
@@ -53,46 +144,24 @@ class PostgresTarget(Target):
 
         inserted_medicion = 0
         inserted_dataraw = 0
+        started = time.monotonic()
 
         try:
-            with conn.cursor() as cur:
-                for r in records:
-                    try:
-                        # Insertar en dataraw (siempre)
-                        cur.execute("""
-                            insert into dataraw (filename, data)
-                            values (%s, %s)
-                            on conflict (filename) do nothing
-                        """, (r.filename, Json(r.raw_json)))
-                        if cur.rowcount > 0:
-                            inserted_dataraw += 1
-
-                        # Insertar en medicion (si tiene datos decodificados)
-                        if r.packet_type is not None:
-                            cur.execute("""
-                                insert into medicion (
-                                    filename, fecha_medicion, packet_type, temp_c, humidity,
-                                    wind_dir, wind_speed_ms, gust_ms, light_wm2, uvi, rain_mm,
-                                    rssi, raw_data
-                                ) values (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                                on conflict (filename) do nothing
-                            """, (
-                                r.filename, r.fecha_medicion, r.packet_type,
-                                r.temp_c, r.humidity, r.wind_dir,
-                                r.wind_speed_ms, r.gust_ms, r.light_wm2,
-                                r.uvi, r.rain_mm, r.rssi, r.raw_data
-                            ))
-                            if cur.rowcount > 0:
-                                inserted_medicion += 1
-
-                        conn.commit()
-
-                    except Exception as e:
-                        conn.rollback()
-                        self.log_error(f"Error insertando {r.filename}: {e}")
-
-            conn.close()
-            msg = f"medicion: {inserted_medicion}, dataraw: {inserted_dataraw}"
+            for i in range(0, len(records), self.batch_size):
+                batch = records[i:i + self.batch_size]
+                try:
+                    medicion, dataraw = self._insert_batch(conn, batch)
+                except psycopg2.Error as e:
+                    conn.rollback()
+                    self.log_error(f"Lote de {len(batch)} falló, reintentando fila por fila: {e}")
+                    medicion, dataraw = self._insert_rows(conn, batch)
+                inserted_medicion += medicion
+                inserted_dataraw += dataraw
+
+            self.pool.putconn(conn)
+            elapsed = time.monotonic() - started
+            rate = len(records) / elapsed if elapsed > 0 else 0.0
+            msg = f"medicion: {inserted_medicion}, dataraw: {inserted_dataraw} ({rate:.0f} rows/s)"
             self.log_success(msg)
             return TargetResult(
                 success=True,
@@ -102,7 +171,7 @@ class PostgresTarget(Target):
             )
 
         except Exception as e:
-            conn.close()
+            self.pool.putconn(conn, close=True)
             self.log_error(f"Error general: {e}")
             return TargetResult(
                 success=False,
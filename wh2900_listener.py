@@ -2,32 +2,70 @@
 """
 WH2900 Listener - Guarda cada captura en un JSON separado
 Uso: rtl_433 ... | python3 wh2900_listener.py
+
+Con WH2900_CAPTURE_MODE=journal agrega los paquetes a segmentos NDJSON
+(ver capture_journal.py) en vez de crear un archivo por paquete.
+
+Con WH2900_STREAM_SOCKET manda cada paquete directo al processor daemon
+(ver capture_stream.py); archivo/journal quedan como respaldo.
+
+La línea de rtl_433 se guarda/envía tal cual (sin re-serializar).
 """
 import sys
-import json
 import os
-from datetime import datetime
+
+import capture_journal
+import jsoncodec
+from capture_journal import JournalWriter, capture_filename, write_capture
+from capture_stream import StreamPublisher
 
 CAPTURE_DIR = "/var/log/wh2900"
+CAPTURE_MODE = os.environ.get('WH2900_CAPTURE_MODE', 'files')
+JOURNAL_DIR = os.environ.get('WH2900_JOURNAL_DIR', capture_journal.JOURNAL_DIR)
+JOURNAL_MAX_BYTES = int(os.environ.get('WH2900_JOURNAL_MAX_BYTES', capture_journal.DEFAULT_MAX_BYTES))
+JOURNAL_MAX_AGE = float(os.environ.get('WH2900_JOURNAL_MAX_AGE', capture_journal.DEFAULT_MAX_AGE))
+STREAM_SOCKET = os.environ.get('WH2900_STREAM_SOCKET', '')
 
 def main():
     os.makedirs(CAPTURE_DIR, exist_ok=True)
 
+    journal = None
+    if CAPTURE_MODE == 'journal':
+        journal = JournalWriter(JOURNAL_DIR, JOURNAL_MAX_BYTES, JOURNAL_MAX_AGE)
+
+    def store(filename, line):
+        """Respaldo en disco: journal o archivo individual (atómico: tmp + rename)."""
+        if journal is not None:
+            journal.append(filename, line)
+        else:
+            write_capture(CAPTURE_DIR, filename, line)
+
+    # Lo que el processor no confirma (ack) termina en el respaldo
+    publisher = StreamPublisher(STREAM_SOCKET, fallback=store) if STREAM_SOCKET else None
+
+    try:
+        _listen(store, publisher)
+    finally:
+        if publisher is not None:
+            publisher.close()  # antes que el journal: puede escribir copias sin ack
+        if journal is not None:
+            journal.close()
+
+def _listen(store, publisher=None):
     for line in sys.stdin:
         line = line.strip()
         if not line:
             continue
 
         try:
-            data = json.loads(line)
+            data = jsoncodec.loads(line)
 
-            # Generar nombre de archivo con timestamp
-            ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-            filename = f"{CAPTURE_DIR}/wh2900_{ts}.json"
+            # Generar nombre de archivo con timestamp (UTC)
+            filename = capture_filename()
+            ts = filename[len('wh2900_'):-len('.json')]
 
-            # Guardar JSON
-            with open(filename, 'w') as f:
-                json.dump(data, f)
+            if publisher is None or not publisher.publish(filename, line):
+                store(filename, line)
 
             # Log a stdout para monitoreo
             pkt_data = data.get('rows', [{}])[0].get('data', '')[:20]
@@ -35,7 +73,7 @@ def main():
             print(f"{ts} rssi={rssi} data={pkt_data}...")
             sys.stdout.flush()
 
-        except json.JSONDecodeError:
+        except jsoncodec.DecodeError:
             pass  # Ignorar lineas que no son JSON
         except Exception as e:
             print(f"Error: {e}", file=sys.stderr)
@@ -2,14 +2,34 @@
 """
 WH2900 Listener Service - Captura datos RF via rtl_433 y guarda JSON individuales.
 Diseñado para correr como servicio systemd con reinicio automático.
+
+Con WH2900_CAPTURE_MODE=journal agrega los paquetes a segmentos NDJSON
+(ver capture_journal.py) en vez de crear un archivo por paquete.
+
+Con WH2900_STREAM_SOCKET manda cada paquete directo al processor daemon
+(ver capture_stream.py); archivo/journal quedan como respaldo.
+
+La línea de rtl_433 se guarda/envía tal cual: sólo se parsea (con
+jsoncodec) para validarla y para el log.
 """
 import os
 import sys
-import json
 import subprocess
 from datetime import datetime
 
+import capture_journal
+import jsoncodec
+from capture_journal import JournalWriter, capture_filename, write_capture
+from capture_stream import StreamPublisher
+
 CAPTURE_DIR = "/var/log/wh2900"
+# files = un JSON por paquete, journal = segmentos NDJSON
+CAPTURE_MODE = os.environ.get('WH2900_CAPTURE_MODE', 'files')
+JOURNAL_DIR = os.environ.get('WH2900_JOURNAL_DIR', capture_journal.JOURNAL_DIR)
+JOURNAL_MAX_BYTES = int(os.environ.get('WH2900_JOURNAL_MAX_BYTES', capture_journal.DEFAULT_MAX_BYTES))
+JOURNAL_MAX_AGE = float(os.environ.get('WH2900_JOURNAL_MAX_AGE', capture_journal.DEFAULT_MAX_AGE))
+# Socket del processor daemon (stream_socket en wh2900.ini); vacío = sin streaming
+STREAM_SOCKET = os.environ.get('WH2900_STREAM_SOCKET', '')
 RTL_433_CMD = [
     "rtl_433",
     "-d", "driver=Cariboulite",
@@ -33,6 +53,24 @@ def main():
     # Crear directorio si no existe
     os.makedirs(CAPTURE_DIR, exist_ok=True)
 
+    journal = None
+    if CAPTURE_MODE == 'journal':
+        journal = JournalWriter(JOURNAL_DIR, JOURNAL_MAX_BYTES, JOURNAL_MAX_AGE)
+        log(f"Modo journal: {JOURNAL_DIR}")
+
+    def store(filename, line):
+        """Respaldo en disco: journal o archivo individual (atómico: tmp + rename)."""
+        if journal is not None:
+            journal.append(filename, line)
+        else:
+            write_capture(CAPTURE_DIR, filename, line)
+
+    publisher = None
+    if STREAM_SOCKET:
+        # Lo que el processor no confirma (ack) termina en el respaldo
+        publisher = StreamPublisher(STREAM_SOCKET, fallback=store)
+        log(f"Streaming al processor: {STREAM_SOCKET}")
+
     log("Iniciando rtl_433 listener...")
     log(f"Comando: {' '.join(RTL_433_CMD)}")
 
@@ -55,25 +93,21 @@ def main():
 
             # Intentar parsear como JSON
             try:
-                data = json.loads(line)
+                data = jsoncodec.loads(line)
 
-                # Generar nombre de archivo único
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                # Agregar microsegundos para evitar colisiones
-                usec = datetime.now().strftime("%f")[:3]
-                filename = f"wh2900_{timestamp}_{usec}.json"
-                filepath = os.path.join(CAPTURE_DIR, filename)
+                # Generar nombre de archivo único (con milisegundos para evitar colisiones)
+                filename = capture_filename()
 
-                # Guardar JSON
-                with open(filepath, 'w') as f:
-                    json.dump(data, f)
+                # Se pasa la línea original: sin re-serializar el dict
+                if publisher is None or not publisher.publish(filename, line):
+                    store(filename, line)
 
                 # Log breve
                 rssi = data.get('rssi', 'N/A')
                 bits = data.get('len', data.get('bits', 'N/A'))
                 log(f"Captura: {filename} (RSSI: {rssi}, bits: {bits})")
 
-            except json.JSONDecodeError:
+            except jsoncodec.DecodeError:
                 # No es JSON, probablemente mensaje de rtl_433
                 if "Found" in line or "Tuned" in line or "Exact" in line:
                     log(f"rtl_433: {line}")
@@ -83,6 +117,10 @@ def main():
     finally:
         process.terminate()
         process.wait()
+        if publisher is not None:
+            publisher.close()  # antes que el journal: puede escribir copias sin ack
+        if journal is not None:
+            journal.close()
         log("rtl_433 terminado")
 
 
@@ -9,14 +9,18 @@ import os
 import sys
 import configparser
 import subprocess
-import requests
 from datetime import datetime, timedelta
 
+from http_pool import HttpClient
+
 # Configuración
 ALERT_EMAIL = "clima@daf.ar"
 STATE_FILE = "/var/log/wh2900/monitor_state.txt"
 LOG_FILE = "/var/log/wh2900/monitor.log"
 
+# Sesiones keep-alive compartidas (una por host)
+http = HttpClient(connect_timeout=10, read_timeout=30)
+
 
 def log(msg: str):
     """Log a archivo y stdout."""
@@ -56,7 +60,7 @@ def check_weathercloud(device_id: str) -> tuple[bool, str]:
     # Usar la página del dispositivo y extraer epoch del meta tag
     url = f"https://app.weathercloud.net/d{device_id}"
     try:
-        resp = requests.get(url, timeout=30, headers={
+        resp = http.get(url, headers={
             'User-Agent': 'Mozilla/5.0 (compatible; WH2900-Monitor/1.0)'
         })
         if resp.status_code == 200:
@@ -108,7 +112,7 @@ def check_pwsweather(station_id: str) -> tuple[bool, str]:
     """
     url = f"https://www.pwsweather.com/station/pws/{station_id}"
     try:
-        resp = requests.get(url, timeout=30, headers={
+        resp = http.get(url, headers={
             'User-Agent': 'Mozilla/5.0 (compatible; WH2900-Monitor/1.0)'
         })
         if resp.status_code == 200:
@@ -131,7 +135,7 @@ def check_wunderground(station_id: str) -> tuple[bool, str]:
     """
     url = f"https://api.weather.com/v2/pws/observations/current?stationId={station_id}&format=json&units=m&apiKey=6532d6454b8aa370768e63d6ba5a832e"
     try:
-        resp = requests.get(url, timeout=30, headers={
+        resp = http.get(url, headers={
             'User-Agent': 'WH2900-Monitor/1.0'
         })
         if resp.status_code == 200:
@@ -3,105 +3,47 @@
 WH2900 Processor - Procesa capturas JSON y las envía a múltiples targets.
 Configuración via wh2900.ini
 
-Uso: python3 wh2900_processor.py [config.ini]
+Uso: python3 wh2900_processor.py [config.ini] [--daemon] [--interval SEGUNDOS]
+
+Sin --daemon procesa una vez y termina (modo timer de systemd).
+Con --daemon queda corriendo y procesa cada `daemon_interval` segundos,
+reutilizando targets, conexiones y estado entre ciclos.
 """
 import os
 import sys
-import json
 import glob
+import time
+import signal
+import select
+import argparse
+import threading
 import configparser
-from datetime import datetime, timezone
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import Iterator, List, Dict, Optional, Tuple
 
-from targets import Target, WeatherRecord, TargetResult, get_target_class
+from targets import Target, WeatherRecord, TargetResult, TargetDispatcher, get_target_class
 from targets.base import logger
+from targets.dispatcher import DEFAULT_RUN_DEADLINE
+from packet_decoder import decode_hex, EMPTY
+from rtl_time import parse_utc
+import jsoncodec
 from rain_state import RainCalculator
+from capture_journal import JournalReader, write_capture
+from capture_stream import StreamServer
+from dedup import DedupCache, DEFAULT_WINDOW, DEFAULT_MAX_ENTRIES
+import rate_limit
+from outbox import Outbox, DEFAULT_DRAIN_LIMIT
+from ingest_checkpoint import CaptureCheckpoint, scan_captures, CAPTURE_PREFIX, CAPTURE_SUFFIX
+import inotify_watch
 
+DEFAULT_CHUNK_SIZE = 1000  # capturas por lote en run_once
+REJECTED_DIR = 'rejected'  # subdirectorio de capture_dir para capturas que no se pueden parsear
 
-# Tipos de paquete conocidos
-KNOWN_PACKET_TYPES = {0x13, 0x14, 0x15, 0x16, 0x17}
-
-
-def decode_packet(data_hex: str) -> Optional[Dict]:
-    """Decodifica un paquete WH2900."""
-    if len(data_hex) < 16:
-        return None
-
-    try:
-        b = bytes.fromhex(data_hex)
-    except ValueError:
-        return None
-
-    if len(b) < 13:
-        return None
-
-    packet_type = b[3]
 
-    # Alertar sobre tipos de paquete desconocidos
-    if packet_type not in KNOWN_PACKET_TYPES:
-        logger.warning(f"TIPO DESCONOCIDO 0x{packet_type:02X} ({packet_type}) - raw: {data_hex}")
-
-    result = {
-        'packet_type': packet_type,
-        'wind_dir': (b[2] & 0x0F) * 22.5 if len(b) > 2 else None,
-    }
-
-    if len(b) >= 13:
-        b10_11 = (b[10] << 8) | b[11]
-        result['light_wm2'] = b10_11 / 29
-        result['uvi'] = (b[12] >> 4) & 0x0F
-
-    if packet_type == 0x13 and len(b) >= 10:
-        result['temp_c'] = (b[4] - 10) / 10
-        if b[5] >= 128:
-            hum = b[5] - 117
-        else:
-            hum = b[5] + 32
-        result['humidity'] = hum if 0 <= hum <= 100 else None
-        result['wind_speed_ms'] = b[6] / 10
-        result['gust_ms'] = b[7] / 10
-        result['rain_mm'] = (b[9] & 0x0F) * 0.1
-
-    if packet_type == 0x14 and len(b) >= 10:
-        result['temp_c'] = (b[4] - 10) / 10
-        result['wind_speed_ms'] = b[6] / 10
-        result['gust_ms'] = b[7] / 10
-        result['rain_mm'] = (b[9] & 0x0F) * 0.1
-
-    if packet_type == 0x15 and len(b) >= 10:
-        result['temp_c'] = (b[4] + 100) / 10
-        hum = b[5] - 10
-        result['humidity'] = hum if 0 <= hum <= 100 else None
-        result['wind_speed_ms'] = b[6] / 10
-        result['gust_ms'] = b[7] / 10
-        result['rain_mm'] = (b[9] & 0x0F) * 0.1
-
-    # Tipo 0x16 (22): mismo formato que 0x15
-    if packet_type == 0x16 and len(b) >= 10:
-        result['temp_c'] = (b[4] + 100) / 10
-        hum = b[5] - 10
-        result['humidity'] = hum if 0 <= hum <= 100 else None
-        result['wind_speed_ms'] = b[6] / 10
-        result['gust_ms'] = b[7] / 10
-        result['rain_mm'] = (b[9] & 0x0F) * 0.1
-
-    # Tipo 0x17 (23): mismo formato que 0x15/0x16
-    if packet_type == 0x17 and len(b) >= 10:
-        result['temp_c'] = (b[4] + 100) / 10
-        hum = b[5] - 10
-        result['humidity'] = hum if 0 <= hum <= 100 else None
-        result['wind_speed_ms'] = b[6] / 10
-        result['gust_ms'] = b[7] / 10
-        result['rain_mm'] = (b[9] & 0x0F) * 0.1
-
-    return result
-
-
-def process_fineoffset_format(raw_json: Dict, filepath: str, filename: str) -> Optional[WeatherRecord]:
+def process_fineoffset_format(raw_json: Dict, filepath: str, filename: str,
+                              raw: Optional[bytes] = None) -> Optional[WeatherRecord]:
     """Procesa formato Fineoffset-WH65B (ya decodificado por rtl_433)."""
-    time_str = raw_json.get('time', '')
-    fecha = datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S")
-    fecha = fecha.replace(tzinfo=timezone.utc)
+    fecha = parse_utc(raw_json.get('time', ''))
 
     # Convertir light_lux a W/m² (1 W/m² ≈ 126 lux)
     light_lux = raw_json.get('light_lux')
@@ -112,6 +54,7 @@ def process_fineoffset_format(raw_json: Dict, filepath: str, filename: str) -> O
         filename=filename,
         fecha_medicion=fecha,
         raw_json=raw_json,
+        raw=raw,
         raw_data='',  # formato decodificado, no hay raw
         rssi=raw_json.get('rssi'),
         packet_type=None,  # no aplica para formato decodificado
@@ -126,56 +69,116 @@ def process_fineoffset_format(raw_json: Dict, filepath: str, filename: str) -> O
     )
 
 
-def process_raw_format(raw_json: Dict, filepath: str, filename: str) -> Optional[WeatherRecord]:
+def process_raw_format(raw_json: Dict, filepath: str, filename: str,
+                       raw: Optional[bytes] = None) -> Optional[WeatherRecord]:
     """Procesa formato RAW (paquetes hexadecimales sin decodificar)."""
-    time_str = raw_json.get('time', '')
     raw_data = raw_json.get('rows', [{}])[0].get('data', '')
     rssi = raw_json.get('rssi')
+    fecha = parse_utc(raw_json.get('time', ''))
 
-    fecha = datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S")
-    fecha = fecha.replace(tzinfo=timezone.utc)
-
-    decoded = decode_packet(raw_data) or {}
+    packet_type, wind_dir, light_wm2, uvi, temp_c, humidity, wind_speed_ms, gust_ms, rain_mm = \
+        decode_hex(raw_data) or EMPTY
 
     return WeatherRecord(
         filepath=filepath,
         filename=filename,
         fecha_medicion=fecha,
         raw_json=raw_json,
+        raw=raw,
         raw_data=raw_data,
         rssi=rssi,
-        packet_type=decoded.get('packet_type'),
-        temp_c=decoded.get('temp_c'),
-        humidity=decoded.get('humidity'),
-        wind_dir=decoded.get('wind_dir'),
-        wind_speed_ms=decoded.get('wind_speed_ms'),
-        gust_ms=decoded.get('gust_ms'),
-        rain_mm=decoded.get('rain_mm'),
-        light_wm2=decoded.get('light_wm2'),
-        uvi=decoded.get('uvi'),
+        packet_type=packet_type,
+        temp_c=temp_c,
+        humidity=humidity,
+        wind_dir=wind_dir,
+        wind_speed_ms=wind_speed_ms,
+        gust_ms=gust_ms,
+        rain_mm=rain_mm,
+        light_wm2=light_wm2,
+        uvi=uvi,
     )
 
 
+def process_capture(raw_json: Dict, filepath: str, filename: str,
+                    raw: Optional[bytes] = None) -> Optional[WeatherRecord]:
+    """
+    Convierte el JSON de una captura de rtl_433 en WeatherRecord.
+
+    Si se pasan los bytes originales (`raw`) el registro guarda esos bytes
+    y no el dict, que se libera apenas se extraen los campos.
+    """
+    # Detectar formato: Fineoffset-WH65B (decodificado) vs RAW
+    model = raw_json.get('model', '')
+    if model.startswith('Fineoffset'):
+        return process_fineoffset_format(raw_json, filepath, filename, raw)
+    else:
+        return process_raw_format(raw_json, filepath, filename, raw)
+
+
 def process_file(filepath: str) -> Optional[WeatherRecord]:
     """Procesa un archivo JSON y retorna WeatherRecord."""
     try:
-        with open(filepath, 'r') as f:
-            raw_json = json.load(f)
+        with open(filepath, 'rb') as f:
+            raw = f.read()
 
         filename = os.path.basename(filepath)
-
-        # Detectar formato: Fineoffset-WH65B (decodificado) vs RAW
-        model = raw_json.get('model', '')
-        if model.startswith('Fineoffset'):
-            return process_fineoffset_format(raw_json, filepath, filename)
-        else:
-            return process_raw_format(raw_json, filepath, filename)
+        return process_capture(jsoncodec.loads(raw), filepath, filename, raw)
 
     except Exception as e:
         logger.error(f"Error parsing {filepath}: {e}")
         return None
 
 
+def iter_captures(files: List[str], journal: Optional[JournalReader] = None
+                  ) -> Iterator[Tuple[Optional[str], Optional[WeatherRecord]]]:
+    """
+    Lee las capturas de a una: primero los archivos (en orden) y después
+    las entradas pendientes del journal.
+
+    Yields:
+        (ruta del archivo o None si viene del journal, registro o None si
+        no se pudo parsear).
+    """
+    for filepath in files:
+        yield filepath, process_file(filepath)
+    if journal is None:
+        return
+    for segment_path, filename, raw_json in journal.read():
+        try:
+            record = process_capture(raw_json, segment_path, filename)
+        except Exception as e:
+            logger.error(f"Error parsing {filename} ({segment_path}): {e}")
+            record = None
+        yield None, record
+
+
+def iter_chunks(files: List[str], journal: Optional[JournalReader] = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, List[str], List[WeatherRecord]]]:
+    """
+    Agrupa las capturas en lotes de `chunk_size` (0 = todo en un lote).
+
+    Sólo un lote de registros está en memoria a la vez. Al recibir un lote
+    el offset pendiente del journal corresponde a su última entrada, así
+    que journal.commit() confirma exactamente hasta ahí.
+
+    Yields:
+        (capturas leídas, archivos del lote, registros válidos)
+    """
+    captures = iter_captures(files, journal)
+    try:
+        while True:
+            batch = list(islice(captures, chunk_size)) if chunk_size > 0 else list(captures)
+            if not batch:
+                return
+            yield (len(batch),
+                   [path for path, _ in batch if path is not None],
+                   [record for _, record in batch if record is not None])
+            if chunk_size <= 0:
+                return
+    finally:
+        captures.close()  # cierra el segmento del journal si se corta antes
+
+
 def load_targets(config: configparser.ConfigParser) -> List[Target]:
     """Carga targets desde la configuración."""
     targets = []
@@ -192,6 +195,10 @@ def load_targets(config: configparser.ConfigParser) -> List[Target]:
         if target_config.get('active', 'true').lower() != 'true':
             continue
 
+        # Estado de rate limit compartido (se puede sobreescribir por target)
+        if config.has_option('general', 'rate_limit_file'):
+            target_config.setdefault('rate_limit_file', config.get('general', 'rate_limit_file'))
+
         try:
             target_class = get_target_class(target_type)
             targets.append(target_class(target_name, target_config))
@@ -203,42 +210,49 @@ def load_targets(config: configparser.ConfigParser) -> List[Target]:
 
 def calculate_rain_delta(records: List[WeatherRecord], rain_calculator: RainCalculator) -> Optional[float]:
     """
-    Calcula el delta de lluvia a partir de los registros Fineoffset-WH65B.
-    Actualiza los registros con el valor de lluvia incremental.
+    Calcula la lluvia incremental de cada registro Fineoffset-WH65B.
+
+    Recorre el lote ordenado por fecha: cada lectura del acumulador total
+    se reemplaza por la lluvia caída desde la lectura anterior (0 si el
+    contador se reinició) y cada registro recibe los totales 1h/24h/día a
+    su fecha. El estado queda en memoria: process_chunk lo guarda si el
+    lote se entregó y si no lo descarta (rollback), para que el reintento
+    calcule los mismos deltas.
 
     Returns:
-        El delta calculado, o None si no se pudo calcular.
+        La lluvia total del lote, o None si no hubo deltas válidos.
     """
-    # Buscar registros Fineoffset con rain_mm válido
-    fineoffset_records = [
-        r for r in records
-        if r.rain_mm is not None and r.rain_mm > 100  # valores grandes = acumulador total
-    ]
-
-    if not fineoffset_records:
+    total = 0.0
+    valid = 0
+    readings = 0
+
+    for record in sorted(records, key=lambda r: r.fecha_medicion):
+        if record.rain_mm is not None and record.rain_mm > 100:  # valores grandes = acumulador total
+            readings += 1
+            accumulated = record.rain_mm
+            delta, is_valid = rain_calculator.step(record.fecha_medicion, accumulated)
+            # Un delta no válido se manda como 0 para no enviar datos incorrectos
+            record.rain_mm = delta if is_valid else 0.0
+            if is_valid:
+                total += delta
+                valid += 1
+
+        # Totales para los servicios (rainin, dailyrainin, rain_1h)
+        totals = rain_calculator.rain_totals(record.fecha_medicion)
+        if totals is not None:
+            record.rain_1h_mm, record.rain_24h_mm, record.rain_day_mm = totals
+
+    if not readings:
         return None
 
-    # Usar el valor más reciente
-    fineoffset_records.sort(key=lambda r: r.fecha_medicion, reverse=True)
-    latest = fineoffset_records[0]
-
-    # Calcular delta
-    delta, is_valid = rain_calculator.calculate_rain_delta(latest.rain_mm)
-
-    if is_valid:
-        logger.info(f"Rain delta: {delta:.1f}mm (acumulado: {latest.rain_mm:.1f}mm)")
-        # Actualizar todos los registros con el delta calculado
-        for record in records:
-            if record.rain_mm is not None and record.rain_mm > 100:
-                record.rain_mm = delta
+    if valid:
+        logger.info(f"Rain delta: {total:.1f}mm en {valid} lecturas (acumulado: {accumulated:.1f}mm)")
     else:
-        logger.info(f"Rain delta no válido (primera ejecución o reset). Acumulado: {latest.rain_mm:.1f}mm")
-        # Marcar como 0 para no enviar datos incorrectos
-        for record in records:
-            if record.rain_mm is not None and record.rain_mm > 100:
-                record.rain_mm = 0.0
+        logger.info(f"Rain delta no válido (primera ejecución, reset o ya contabilizado). Acumulado: {accumulated:.1f}mm")
+    if totals is not None:
+        logger.info(f"Lluvia: 1h={totals[0]:.1f}mm 24h={totals[1]:.1f}mm día={totals[2]:.1f}mm")
 
-    return delta if is_valid else None
+    return total if valid else None
 
 
 def should_delete_file(results: List[TargetResult], policy: str) -> bool:
@@ -259,12 +273,433 @@ def should_delete_file(results: List[TargetResult], policy: str) -> bool:
     return False
 
 
-def main():
-    # Buscar archivo de configuración
-    if len(sys.argv) > 1:
-        config_path = sys.argv[1]
+def remove_captures(records: List[WeatherRecord], journal: Optional[JournalReader] = None) -> int:
+    """Borra los archivos de captura de `records` (journal y stream se saltean)."""
+    deleted = 0
+    for record in records:
+        if not record.filepath:
+            continue  # recibido por stream, no tiene archivo
+        if journal is not None and record.filepath.startswith(journal.journal_dir + os.sep):
+            continue
+        try:
+            os.remove(record.filepath)
+            deleted += 1
+        except OSError as e:
+            logger.error(f"Error eliminando {record.filepath}: {e}")
+    return deleted
+
+
+def reject_captures(files: List[str], records: List[WeatherRecord], capture_dir: str) -> int:
+    """
+    Mueve a capture_dir/rejected los archivos del lote que no dieron un
+    registro (JSON inválido, modelo desconocido): si no, quedan en
+    capture_dir para siempre y el checkpoint no los puede pasar.
+    """
+    parsed = {record.filepath for record in records}
+    rejected = [path for path in files if path not in parsed]
+    if not rejected:
+        return 0
+    rejected_dir = os.path.join(capture_dir, REJECTED_DIR)
+    moved = 0
+    for path in rejected:
+        try:
+            os.makedirs(rejected_dir, exist_ok=True)
+            os.replace(path, os.path.join(rejected_dir, os.path.basename(path)))
+            moved += 1
+        except OSError as e:
+            logger.error(f"Error moviendo {path} a {rejected_dir}: {e}")
+    return moved
+
+
+def spill_streamed(records: List[WeatherRecord], capture_dir: str) -> int:
+    """Guarda como archivos las capturas recibidas por stream que no se pudieron entregar."""
+    spilled = 0
+    for record in records:
+        if record.filepath:
+            continue
+        try:
+            record.filepath = write_capture(capture_dir, record.filename, record.raw_json)
+            spilled += 1
+        except OSError as e:
+            logger.error(f"Error guardando {record.filename}: {e}")
+    return spilled
+
+
+def read_streamed(frames: List[Tuple[str, Dict]]) -> List[WeatherRecord]:
+    """Convierte los frames del stream en registros (filepath vacío: no hay archivo)."""
+    records = []
+    for filename, raw_json in frames:
+        try:
+            record = process_capture(raw_json, '', filename)
+        except Exception as e:
+            logger.error(f"Error parsing {filename} (stream): {e}")
+            continue
+        if record:
+            records.append(record)
+    return records
+
+
+def log_results(results: List[TargetResult]):
+    for result in results:
+        status = "OK" if result.success else "FAIL"
+        logger.info(f"  {result.target_name}: {status} - {result.message}")
+
+
+def deliver_outbox(dispatcher: TargetDispatcher, outbox: Outbox, drain_limit: int = DEFAULT_DRAIN_LIMIT):
+    """
+    Envía a cada target lo que todavía no confirmó en el outbox.
+
+    Un target que responde OK avanza su cursor; uno que falla vuelve a
+    recibir los mismos registros en el próximo ciclo, sin afectar al resto.
+    """
+    pending = {t.name: outbox.pending(t.name, drain_limit) for t in dispatcher.targets}
+    if not any(pending.values()):
+        return
+
+    for name, rows in pending.items():
+        if rows:
+            logger.info(f"Outbox {name}: {len(rows)} registros pendientes")
+
+    results = dispatcher.send({name: [r for _, r in rows] for name, rows in pending.items()})
+    log_results(results)
+    rate_limit.flush_all()
+
+    for result in results:
+        rows = pending[result.target_name]
+        if result.success and rows:
+            outbox.ack(result.target_name, rows[-1][0])
+
+    pruned = outbox.prune([t.name for t in dispatcher.targets])
+    if pruned:
+        logger.info(f"Outbox: {pruned} registros entregados a todos los targets")
+
+
+def process_chunk(files: List[str], records: List[WeatherRecord], capture_dir: str,
+                  dispatcher: TargetDispatcher, rain_calculator: RainCalculator, delete_policy: str,
+                  journal: Optional[JournalReader] = None, dedup: Optional[DedupCache] = None,
+                  outbox: Optional[Outbox] = None, checkpoint: Optional[CaptureCheckpoint] = None) -> bool:
+    """
+    Procesa un lote de run_once: dedup, lluvia, envío y borrado/checkpoint.
+
+    `files` son las rutas leídas en el lote; las que no se pudieron
+    parsear se mueven a capture_dir/rejected, así el checkpoint sólo pasa
+    por archivos entregados o apartados.
+
+    Returns:
+        True si el lote quedó entregado (o en el outbox) y se puede seguir
+        con el próximo; False si hay que reintentarlo en otro ciclo.
+    """
+    rejected = reject_captures(files, records, capture_dir)
+    if rejected:
+        logger.warning(f"Capturas inválidas movidas a {os.path.join(capture_dir, REJECTED_DIR)}: {rejected}")
+
+    if not records:
+        if journal is not None:
+            journal.commit()  # sólo había líneas inválidas
+        if checkpoint is not None and files:
+            checkpoint.advance(files[-1])
+        return True
+
+    # Descartar repeticiones de rtl_433 (se conserva la copia de mejor RSSI)
+    to_send = records
+    if dedup is not None:
+        to_send, duplicates = dedup.filter(records)
+        if duplicates:
+            logger.info(f"Duplicados descartados: {len(duplicates)} ({dedup.stats()})")
+
+    # Calcular lluvia incremental (convierte acumulador total a delta)
+    calculate_rain_delta(to_send, rain_calculator)
+
+    if outbox is not None:
+        # Una vez en el outbox (durable) las capturas ya no hacen falta
+        added = outbox.append(to_send)
+        logger.info(f"Outbox: {added} registros nuevos")
+        ok = True
+    elif not to_send:
+        # dedup sólo descarta copias de transmisiones ya entregadas (commit)
+        logger.info("Lote sin registros nuevos: todas las capturas son copias ya entregadas")
+        ok = True
     else:
-        config_path = os.path.join(os.path.dirname(__file__), 'wh2900.ini')
+        # Enviar a todos los targets en paralelo (con deadline por ciclo)
+        all_results: List[TargetResult] = dispatcher.send(to_send)
+        log_results(all_results)
+
+        # Persistir la hora de los pushes exitosos para el próximo ciclo
+        rate_limit.flush_all()
+
+        # Con delete_policy = never los archivos quedan: entregado si todos lo recibieron
+        ok = should_delete_file(all_results, 'all' if delete_policy == 'never' else delete_policy)
+
+    if not ok:
+        # Nada se confirma: el próximo ciclo relee el lote, no son duplicados
+        # y la lluvia da los mismos deltas
+        logger.warning(f"Archivos NO eliminados (política: {delete_policy}, algún target falló)")
+        rain_calculator.rollback()
+        if journal is not None:
+            journal.rewind()
+        spilled = spill_streamed(records, capture_dir)
+        if spilled:
+            logger.info(f"Capturas del stream guardadas en disco para reintentar: {spilled}")
+        return False
+
+    # Lote entregado: primero el estado (dedup, lluvia), después borrar/confirmar capturas
+    if dedup is not None:
+        dedup.commit()
+    rain_calculator.save()
+
+    # never: las capturas quedan, salvo con outbox sin checkpoint (se re-ingresarían cada ciclo)
+    keep = delete_policy == 'never' and (outbox is None or checkpoint is not None)
+    if not keep:
+        logger.info(f"Archivos eliminados: {remove_captures(records, journal)}")
+        if journal is not None:
+            journal.commit()
+    else:
+        if outbox is not None and journal is not None:
+            journal.commit()  # ya está en el outbox: re-leerlo sólo lo duplicaría
+        elif journal is not None:
+            journal.rewind()
+        # Las del stream se guardan en disco y el checkpoint las pasa: ya se ingresaron
+        streamed = [r for r in records if not r.filepath]
+        spill_streamed(streamed, capture_dir)
+        files = files + [r.filepath for r in streamed if r.filepath]
+
+    if checkpoint is not None and files:
+        checkpoint.advance(max(files, key=os.path.basename))
+    return True
+
+
+def run_once(capture_dir: str, dispatcher: TargetDispatcher, rain_calculator: RainCalculator,
+             delete_policy: str, journal: Optional[JournalReader] = None,
+             dedup: Optional[DedupCache] = None, outbox: Optional[Outbox] = None,
+             checkpoint: Optional[CaptureCheckpoint] = None,
+             streamed: Optional[List[Tuple[str, Dict]]] = None,
+             chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Procesa una tanda de capturas y las envía a los targets.
+
+    Lee los archivos individuales de `capture_dir` y, si hay journal,
+    las entradas pendientes de sus segmentos. Con `dedup` las copias
+    repetidas de una misma transmisión no se envían (sus archivos se
+    borran igual que los demás).
+
+    Las capturas se procesan en lotes de `chunk_size` (scan → parse →
+    lluvia → envío → borrado), así que la memoria no depende del tamaño
+    del backlog y cada lote entregado queda borrado/confirmado aunque un
+    lote posterior falle. Si un lote falla no se siguen leyendo los
+    siguientes: quedan para el próximo ciclo, en orden.
+
+    Con `outbox` los registros se guardan primero en el outbox local, los
+    archivos se borran al ingresarlos y cada target recibe sólo lo que le
+    falta confirmar. Con delete_policy = never y `checkpoint` los archivos
+    quedan y el checkpoint avanza con cada lote ingresado al outbox.
+
+    Con `checkpoint` sólo se leen los archivos posteriores al último
+    ingresado; el checkpoint avanza con cada lote entregado (o en el
+    outbox), si no el próximo ciclo los vuelve a leer. Sólo ahorra algo
+    con delete_policy = never (con all/any lo entregado ya se borra). Si
+    el reloj quedó atrás del checkpoint se lo retrocede, y con all/any los
+    archivos anteriores al checkpoint (que con esas políticas no quedan
+    después de entregarse) se procesan igual.
+
+    `streamed` son capturas recibidas por el socket del listener, como
+    (filename, json); van en un último lote (son las más nuevas) y si los
+    targets fallan se guardan como archivos para el próximo ciclo.
+
+    Returns:
+        Cantidad de capturas encontradas.
+    """
+    # Buscar archivos (sólo los nuevos si hay checkpoint)
+    if checkpoint is not None:
+        last = checkpoint.last
+        if checkpoint.check_clock():
+            logger.warning(f"Reloj atrasado respecto del checkpoint ({last}): se retrocede a {checkpoint.last}")
+        files, older = scan_captures(capture_dir, checkpoint.last)
+        if older and delete_policy != 'never':
+            logger.warning(f"{len(older)} capturas anteriores al checkpoint ({checkpoint.last}), se procesan")
+            files = older + files
+    else:
+        files = sorted(glob.glob(os.path.join(capture_dir, "wh2900_*.json")))
+
+    if files:
+        logger.info(f"Procesando {len(files)} archivos" +
+                    (f" en lotes de {chunk_size}..." if 0 < chunk_size < len(files) else "..."))
+
+    total = 0
+    ok = True
+    chunks = iter_chunks(files, journal, chunk_size)
+    try:
+        for count, chunk_files, records in chunks:
+            total += count
+            logger.info(f"Lote: {count} capturas, registros válidos: {len(records)}")
+            ok = process_chunk(chunk_files, records, capture_dir, dispatcher, rain_calculator,
+                               delete_policy, journal, dedup, outbox, checkpoint)
+            if not ok:
+                break
+    finally:
+        chunks.close()
+
+    if streamed:
+        total += len(streamed)
+        records = read_streamed(streamed)
+        if ok:
+            logger.info(f"Stream: {len(streamed)} capturas, registros válidos: {len(records)}")
+            process_chunk([], records, capture_dir, dispatcher, rain_calculator,
+                          delete_policy, journal, dedup, outbox, checkpoint)
+        else:
+            # Un lote anterior falló: van a disco detrás de los archivos pendientes
+            spilled = spill_streamed(records, capture_dir)
+            logger.info(f"Capturas del stream guardadas en disco para reintentar: {spilled}")
+
+    if outbox is not None:
+        deliver_outbox(dispatcher, outbox)  # incluye reintentar lo pendiente
+
+    return total
+
+
+def run_daemon(capture_dir: str, dispatcher: TargetDispatcher, rain_calculator: RainCalculator,
+               delete_policy: str, interval: float, journal: Optional[JournalReader] = None,
+               dedup: Optional[DedupCache] = None, outbox: Optional[Outbox] = None,
+               checkpoint: Optional[CaptureCheckpoint] = None,
+               watcher: Optional['inotify_watch.InotifyWatcher'] = None, batch_window: float = 0.5,
+               stream: Optional[StreamServer] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Loop de procesamiento para el modo --daemon.
+
+    Mantiene en memoria targets, conexiones y estado; corre `run_once`
+    cada `interval` segundos hasta recibir SIGTERM/SIGINT.
+
+    Con `watcher` (inotify) o `stream` (socket del listener) el ciclo
+    arranca apenas llega una captura, esperando `batch_window` segundos
+    para juntar las repeticiones de la misma ráfaga; `interval` queda como
+    scan de respaldo.
+    """
+    stop = threading.Event()
+
+    def _handle_signal(signum, frame):
+        logger.info(f"Señal {signum} recibida, terminando...")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, _handle_signal)
+    signal.signal(signal.SIGINT, _handle_signal)
+
+    sources = []
+    if watcher is not None:
+        sources.append('inotify')
+    if stream is not None:
+        sources.append(f'stream {stream.path}')
+    if sources:
+        logger.info(f"Modo daemon: {', '.join(sources)} (lote de {batch_window * 1000:g}ms, scan cada {interval:g}s)")
+    else:
+        logger.info(f"Modo daemon: procesando cada {interval:g}s")
+
+    while not stop.is_set():
+        started = time.monotonic()
+        frames = stream.take() if stream is not None else []
+        try:
+            run_once(capture_dir, dispatcher, rain_calculator, delete_policy, journal, dedup, outbox,
+                     checkpoint, frames, chunk_size)
+            saved = True  # entregados, o en disco si el envío falló
+        except Exception as e:
+            # Un ciclo fallido no debe tirar abajo el daemon (ni perder lo recibido por stream)
+            logger.exception(f"Error en ciclo de procesamiento: {e}")
+            saved = save_frames(frames, capture_dir)
+        if stream is not None and saved:
+            stream.ack()  # el listener ya puede soltar sus copias
+
+        if watcher is None and stream is None:
+            elapsed = time.monotonic() - started
+            stop.wait(max(0.0, interval - elapsed))
+        else:
+            wait_for_captures(stop, started + interval, batch_window, watcher, stream)
+
+    if stream is not None:
+        # Lo recibido después del último ciclo queda en disco para el próximo arranque
+        if save_frames(stream.take(), capture_dir):
+            stream.ack()
+
+    logger.info("Daemon detenido")
+
+
+def save_frames(frames: List[Tuple[str, Dict]], capture_dir: str) -> bool:
+    """Escribe frames del stream como archivos; False si alguno no se pudo guardar."""
+    saved = True
+    for filename, data in frames:
+        try:
+            write_capture(capture_dir, filename, data)
+        except OSError as e:
+            logger.error(f"Error guardando {filename}: {e}")
+            saved = False
+    return saved
+
+
+def _is_capture_event(name: str) -> bool:
+    """Captura individual terminada o segmento del journal (no los .tmp del listener)."""
+    return (name.startswith(CAPTURE_PREFIX) and name.endswith(CAPTURE_SUFFIX)) or name.startswith('journal_')
+
+
+def wait_for_captures(stop: threading.Event, deadline: float, batch_window: float,
+                      watcher: Optional['inotify_watch.InotifyWatcher'] = None,
+                      stream: Optional[StreamServer] = None):
+    """
+    Bloquea hasta que llega una captura nueva (o hasta `deadline`) y luego
+    espera `batch_window` segundos para procesar la ráfaga completa junta.
+    """
+    def _poll(timeout: float) -> bool:
+        readers = ([watcher.fd] if watcher is not None else []) + (stream.sockets() if stream is not None else [])
+        ready, _, _ = select.select(readers, [], [], max(0.0, timeout))
+        arrived = False
+        if watcher is not None and watcher.fd in ready:
+            arrived = any(_is_capture_event(name) for _, name, _ in watcher.read_events())
+        if stream is not None:
+            stream.process(ready)
+            arrived = arrived or bool(stream.frames)
+        return arrived
+
+    while not stop.is_set():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        # Esperas cortas para atender SIGTERM sin demora
+        if _poll(min(1.0, remaining)):
+            # Lo que llega durante la ventana va en este ciclo
+            window_end = time.monotonic() + batch_window
+            while not stop.is_set() and time.monotonic() < window_end:
+                _poll(window_end - time.monotonic())
+            return
+
+
+def make_watcher(capture_dir: str, journal: Optional[JournalReader] = None):
+    """Crea el watcher de inotify (None si no está disponible: se sigue con polling)."""
+    watcher = None
+    try:
+        watcher = inotify_watch.InotifyWatcher()
+        watcher.add_watch(capture_dir, inotify_watch.CAPTURE_EVENTS)
+        if journal is not None:
+            watcher.add_watch(journal.journal_dir, inotify_watch.CAPTURE_EVENTS | inotify_watch.IN_MODIFY)
+    except OSError as e:
+        logger.warning(f"watch = true pero inotify no está disponible ({e}); usando polling")
+        if watcher is not None:
+            watcher.close()
+        return None
+    return watcher
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parsea argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description='WH2900 Processor')
+    parser.add_argument('config', nargs='?',
+                        default=os.path.join(os.path.dirname(__file__), 'wh2900.ini'),
+                        help='Archivo de configuración (default: wh2900.ini junto al script)')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Queda corriendo y procesa en loop (en vez de una sola vez)')
+    parser.add_argument('--interval', type=float, default=None,
+                        help='Segundos entre ciclos en modo daemon (default: daemon_interval del INI)')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    config_path = args.config
 
     if not os.path.exists(config_path):
         logger.error(f"Archivo de configuración no encontrado: {config_path}")
@@ -277,10 +712,37 @@ def main():
     capture_dir = config.get('general', 'capture_dir', fallback='/var/log/wh2900')
     delete_policy = config.get('general', 'delete_policy', fallback='all')
     rain_state_file = config.get('general', 'rain_state_file', fallback='/var/log/wh2900/rain_state.json')
+    capture_mode = config.get('general', 'capture_mode', fallback='files')
 
     # Inicializar calculador de lluvia incremental
     rain_calculator = RainCalculator(rain_state_file)
 
+    # Journal de capturas (los archivos sueltos se siguen procesando igual)
+    journal = None
+    if capture_mode == 'journal':
+        journal_dir = config.get('general', 'journal_dir', fallback=os.path.join(capture_dir, 'journal'))
+        journal = JournalReader(journal_dir)
+
+    # Cache de duplicados (en modo daemon dura entre ciclos)
+    dedup = None
+    dedup_window = config.getfloat('general', 'dedup_window', fallback=DEFAULT_WINDOW)
+    if dedup_window > 0:
+        dedup = DedupCache(dedup_window, config.getint('general', 'dedup_max_entries', fallback=DEFAULT_MAX_ENTRIES))
+
+    # Ingesta incremental: sólo archivos posteriores al último ingresado
+    checkpoint_file = config.get('general', 'ingest_checkpoint_file', fallback='')
+    chunk_size = config.getint('general', 'chunk_size', fallback=DEFAULT_CHUNK_SIZE)
+    checkpoint = CaptureCheckpoint(checkpoint_file) if checkpoint_file else None
+
+    # Outbox durable con cursor por target (vacío = envío directo desde archivos)
+    outbox_file = config.get('general', 'outbox_file', fallback='')
+    if not outbox_file and checkpoint is not None and delete_policy == 'never':
+        # Con never el checkpoint avanza cuando el lote está en el outbox y cada
+        # target reintenta lo suyo; sin outbox un target caído frena el checkpoint
+        outbox_file = os.path.join(os.path.dirname(checkpoint_file) or '.', 'outbox.db')
+        logger.info(f"delete_policy = never con checkpoint: usando outbox {outbox_file}")
+    outbox = Outbox(outbox_file) if outbox_file else None
+
     # Cargar targets
     targets = load_targets(config)
     active_targets = [t for t in targets if t.active]
@@ -291,50 +753,47 @@ def main():
 
     logger.info(f"Targets activos: {[t.name for t in active_targets]}")
 
-    # Buscar archivos
-    pattern = os.path.join(capture_dir, "wh2900_*.json")
-    files = glob.glob(pattern)
-
-    if not files:
-        return
-
-    logger.info(f"Procesando {len(files)} archivos...")
-
-    # Procesar archivos
-    records = []
-    for f in files:
-        record = process_file(f)
-        if record:
-            records.append(record)
-
-    logger.info(f"Registros válidos: {len(records)}")
-
-    if not records:
-        return
-
-    # Calcular lluvia incremental (convierte acumulador total a delta)
-    calculate_rain_delta(records, rain_calculator)
-
-    # Enviar a cada target
-    all_results: List[TargetResult] = []
-    for target in active_targets:
-        result = target.send(records)
-        all_results.append(result)
-        status = "OK" if result.success else "FAIL"
-        logger.info(f"  {target.name}: {status} - {result.message}")
+    run_deadline = config.getfloat('general', 'run_deadline', fallback=DEFAULT_RUN_DEADLINE)
+    engine = None
+    if config.get('general', 'http_engine', fallback='threads') == 'async':
+        import async_delivery
+        if async_delivery.AVAILABLE:
+            engine = async_delivery.get_engine()
+        else:
+            logger.warning("http_engine = async requiere aiohttp; usando threads")
+    dispatcher = TargetDispatcher(active_targets, run_deadline, engine)
 
-    # Decidir si borrar archivos
-    if should_delete_file(all_results, delete_policy):
-        deleted = 0
-        for record in records:
+    try:
+        if args.daemon:
+            interval = args.interval
+            if interval is None:
+                interval = config.getfloat('general', 'daemon_interval', fallback=60.0)
+            watcher = None
+            if config.getboolean('general', 'watch', fallback=False):
+                watcher = make_watcher(capture_dir, journal)
+            batch_window = config.getfloat('general', 'watch_batch_ms', fallback=500) / 1000
+            # Capturas directo del listener (WH2900_STREAM_SOCKET), sin pasar por disco
+            stream = None
+            stream_socket = config.get('general', 'stream_socket', fallback='')
+            if stream_socket:
+                stream = StreamServer(stream_socket)
             try:
-                os.remove(record.filepath)
-                deleted += 1
-            except OSError as e:
-                logger.error(f"Error eliminando {record.filepath}: {e}")
-        logger.info(f"Archivos eliminados: {deleted}")
-    else:
-        logger.warning(f"Archivos NO eliminados (política: {delete_policy}, algún target falló)")
+                run_daemon(capture_dir, dispatcher, rain_calculator, delete_policy, interval, journal, dedup,
+                           outbox, checkpoint, watcher, batch_window, stream, chunk_size)
+            finally:
+                if watcher is not None:
+                    watcher.close()
+                if stream is not None:
+                    stream.close()
+        else:
+            run_once(capture_dir, dispatcher, rain_calculator, delete_policy, journal, dedup, outbox, checkpoint,
+                     chunk_size=chunk_size)
+    finally:
+        dispatcher.shutdown()
+        if outbox is not None:
+            outbox.close()
+        if engine is not None:
+            engine.close()
 
 
 if __name__ == "__main__":